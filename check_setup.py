@@ -3,6 +3,7 @@
 Quick script to verify that the installation is correct and all dependencies are available.
 """
 
+import importlib.util
 import sys
 from pathlib import Path
 
@@ -30,10 +31,10 @@ def check_modules():
 
     all_ok = True
     for module_name, display_name in required_modules:
-        try:
-            __import__(module_name)
+        # find_spec only locates the module, it doesn't execute it
+        if importlib.util.find_spec(module_name) is not None:
             print(f"✓ {display_name}")
-        except ImportError:
+        else:
             print(f"✗ {display_name} - not installed")
             all_ok = False
 
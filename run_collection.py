@@ -4,6 +4,7 @@ Simple script to run data collection for Quebec market trends.
 Run this script to collect the latest Google Trends data.
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -15,6 +16,14 @@ from src.data_collection.trends_collector import QuebecTrendsCollector
 
 def main():
     """Run the data collection process."""
+    parser = argparse.ArgumentParser(description="Collect Google Trends data for the Quebec market.")
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help="Collect even if the last complete run is more recent than collection.min_refresh_hours"
+    )
+    args = parser.parse_args()
+
     print("=" * 70)
     print("Quebec Market Trends - Data Collection")
     print("=" * 70)
@@ -30,7 +39,16 @@ def main():
         print("Starting data collection...")
         print("This may take several minutes depending on the number of keywords.\n")
 
-        stats = collector.collect_all_categories()
+        with collector:
+            stats = collector.collect_all_categories(force=args.force)
+
+        if stats.get('cached'):
+            print("=" * 70)
+            print("Nothing collected: data is still fresh.")
+            print("=" * 70)
+            print(f"The last complete run ended at {stats['end_time']}.")
+            print("Run again with --force to collect anyway.")
+            return 0
 
         # Display results
         print("\n" + "=" * 70)
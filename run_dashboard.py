@@ -3,7 +3,6 @@
 Simple script to launch the Streamlit dashboard.
 """
 
-import subprocess
 import sys
 from pathlib import Path
 
@@ -29,13 +28,16 @@ def main():
     print()
 
     try:
-        # Run streamlit
-        subprocess.run([
-            sys.executable, "-m", "streamlit", "run",
-            str(dashboard_path),
-            "--server.port=8501",
-            "--server.headless=true"
-        ])
+        # Run streamlit in this process instead of spawning a second
+        # interpreter through `python -m streamlit run`
+        from streamlit.web import bootstrap
+
+        flag_options = {
+            "server_port": 8501,
+            "server_headless": True
+        }
+        bootstrap.load_config_options(flag_options=flag_options)
+        bootstrap.run(str(dashboard_path), False, [], flag_options)
 
     except KeyboardInterrupt:
         print("\n\n✓ Dashboard stopped.")
@@ -9,6 +9,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from pathlib import Path
+import io
+import os
+import pickle
 import yaml
 import sys
 
@@ -16,7 +19,6 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.data_collection.database import TrendsDatabase
-from src.data_collection.trends_collector import QuebecTrendsCollector
 
 
 # Page configuration
@@ -54,11 +56,34 @@ st.markdown("""
 
 
 @st.cache_resource
+def _load_yaml_cached(path):
+    """Load a YAML file, reusing a pickled copy while the YAML is unchanged."""
+    pickle_path = path.with_suffix('.yaml.pickle')
+
+    try:
+        if pickle_path.stat().st_mtime >= path.stat().st_mtime:
+            with open(pickle_path, 'rb') as f:
+                return pickle.load(f)
+    except Exception:
+        pass  # Missing or unreadable cache: parse the YAML below
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+
+    try:
+        tmp_path = pickle_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pickle_path)
+    except OSError:
+        pass  # Read-only checkout: keep parsing the YAML on each start
+
+    return data
+
+
 def load_config():
     """Load configuration file."""
-    config_path = Path("config/config.yaml")
-    with open(config_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    return _load_yaml_cached(Path("config/config.yaml"))
 
 
 @st.cache_resource
@@ -68,22 +93,74 @@ def get_database():
     return TrendsDatabase(config['database']['path'])
 
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_trends_data(keywords=None, category=None, days_back=365):
-    """Load trends data from database."""
-    db = get_database()
+def get_date_range(days_back):
+    """Get (start_date, end_date) strings covering the last days_back days."""
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days_back)
+    return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
 
-    data = db.get_trends_data(
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def load_trends_data(keywords=None, categories=None, days_back=365):
+    """Load trends data from the packed series (categories as a hashable tuple)."""
+    db = get_database()
+    start_date, end_date = get_date_range(days_back)
+
+    data = db.get_trends_series(
         keywords=keywords,
-        category=category,
-        start_date=start_date.strftime('%Y-%m-%d'),
-        end_date=end_date.strftime('%Y-%m-%d')
+        categories=list(categories) if categories else None,
+        start_date=start_date,
+        end_date=end_date
     )
     return data
 
 
+@st.cache_data(ttl=300)
+def load_raw_trends_data(categories, days_back=365):
+    """Load full trends_data rows (id, geo, collected_at...) when the raw data tab asks for them."""
+    start_date, end_date = get_date_range(days_back)
+    return get_database().get_trends_data(
+        categories=list(categories),
+        start_date=start_date,
+        end_date=end_date
+    )
+
+
+@st.cache_data(ttl=300)
+def load_keyword_stats(categories, days_back=365):
+    """Load per-keyword average and max interest for the given categories."""
+    start_date, end_date = get_date_range(days_back)
+    return get_database().get_category_keyword_stats(list(categories), start_date, end_date)
+
+
+@st.cache_data(ttl=300)
+def load_daily_category_means(categories, days_back=365):
+    """Load the average interest per date for each category."""
+    start_date, end_date = get_date_range(days_back)
+    return get_database().get_daily_category_means(list(categories), start_date, end_date)
+
+
+@st.cache_data(ttl=60)
+def cached_summary_stats():
+    """Load database summary statistics for the sidebar."""
+    return get_database().get_summary_stats()
+
+
+@st.cache_data(ttl=300)
+def load_trend_windows(categories, days_back=365):
+    """Load average interest and 30-day trend windows for each category."""
+    start_date, end_date = get_date_range(days_back)
+    return get_database().get_trend_windows(list(categories), start_date, end_date)
+
+
+@st.cache_data(ttl=300, max_entries=4)
+def to_csv_bytes(df):
+    """Serialize a DataFrame to UTF-8 CSV bytes for download."""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, encoding='utf-8')
+    return buffer.getvalue()
+
+
 def main():
     """Main dashboard application."""
 
@@ -91,9 +168,8 @@ def main():
     st.markdown('<div class="main-header">📊 Analyse de Tendances - Marché Québécois</div>', unsafe_allow_html=True)
     st.markdown('<div class="sub-header">Meubles • Électroménagers • Matelas • Couvre-planchers</div>', unsafe_allow_html=True)
 
-    # Load configuration and database
+    # Load configuration
     config = load_config()
-    db = get_database()
 
     # Sidebar
     st.sidebar.title("⚙️ Contrôles")
@@ -104,11 +180,20 @@ def main():
     if st.sidebar.button("🔄 Collecter nouvelles données", help="Lance une collecte complète"):
         with st.spinner("Collection en cours... Cela peut prendre quelques minutes."):
             try:
-                collector = QuebecTrendsCollector()
-                stats = collector.collect_all_categories()
+                # Imported lazily: pulls in pytrends/requests, only needed here
+                from src.data_collection.trends_collector import QuebecTrendsCollector
+
+                # Skip keywords whose data is already fresh; force: an explicit
+                # request is never answered from the last-run cache
+                latest_dates = get_database().get_latest_dates_bulk()
+                # Closed right away: the dashboard process outlives the run
+                with QuebecTrendsCollector() as collector:
+                    stats = collector.collect_all_categories(latest_dates=latest_dates, force=True)
 
                 st.sidebar.success(f"✅ Collection terminée!")
                 st.sidebar.info(f"📊 {stats['total_records']} enregistrements ajoutés")
+                if stats['total_skipped']:
+                    st.sidebar.info(f"⏭️ {stats['total_skipped']} mots-clés déjà à jour")
                 st.sidebar.info(f"⏱️ Durée: {stats['duration_seconds']:.1f}s")
 
                 # Clear cache to reload data
@@ -119,13 +204,13 @@ def main():
 
     # Database statistics
     st.sidebar.header("📈 Statistiques")
-    stats = db.get_summary_stats()
+    stats = cached_summary_stats()
 
     st.sidebar.metric("Total d'enregistrements", f"{stats['total_records']:,}")
     st.sidebar.metric("Mots-clés uniques", stats['unique_keywords'])
 
     if stats['last_successful_collection']:
-        last_coll = datetime.fromisoformat(stats['last_successful_collection'])
+        last_coll = stats['last_successful_collection']
         st.sidebar.metric("Dernière collecte", last_coll.strftime('%Y-%m-%d %H:%M'))
 
     # Filters
@@ -170,18 +255,16 @@ def main():
         st.info("💡 La première collecte prendra quelques minutes pour récupérer 12 mois de données.")
         return
 
-    # Load data for selected categories
-    data_frames = []
-    for category in selected_categories:
-        df = load_trends_data(category=category, days_back=days_back)
-        if not df.empty:
-            data_frames.append(df)
-
-    if not data_frames:
+    # Load data for all selected categories in a single query
+    if not selected_categories:
         st.warning("Aucune donnée disponible pour les filtres sélectionnés.")
         return
 
-    all_data = pd.concat(data_frames, ignore_index=True)
+    all_data = load_trends_data(categories=tuple(selected_categories), days_back=days_back)
+
+    if all_data.empty:
+        st.warning("Aucune donnée disponible pour les filtres sélectionnés.")
+        return
 
     # Tab layout
     tab1, tab2, tab3, tab4 = st.tabs(["📈 Tendances", "🔥 Top Keywords", "📊 Comparaison", "📋 Données"])
@@ -198,6 +281,10 @@ def main():
         )
 
         category_data = all_data[all_data['category'] == view_category]
+        # Keep only this category's keyword labels so plotly draws no empty traces
+        category_data = category_data.assign(
+            keyword=category_data['keyword'].cat.remove_unused_categories()
+        )
 
         if not category_data.empty:
             # Line chart with all keywords in category
@@ -221,37 +308,34 @@ def main():
             # Show trend summary
             col1, col2, col3 = st.columns(3)
 
+            summary = category_data.agg({'interest': 'mean', 'keyword': 'nunique'})
+            peak = category_data.loc[category_data['interest'].idxmax()]
+
             with col1:
-                avg_interest = category_data['interest'].mean()
-                st.metric("Intérêt moyen", f"{avg_interest:.1f}")
+                st.metric("Intérêt moyen", f"{summary['interest']:.1f}")
 
             with col2:
-                max_interest = category_data['interest'].max()
-                max_keyword = category_data[category_data['interest'] == max_interest]['keyword'].iloc[0]
-                st.metric("Pic d'intérêt", f"{max_interest} ({max_keyword})")
+                st.metric("Pic d'intérêt", f"{peak['interest']} ({peak['keyword']})")
 
             with col3:
-                unique_keywords = category_data['keyword'].nunique()
-                st.metric("Mots-clés suivis", unique_keywords)
+                st.metric("Mots-clés suivis", int(summary['keyword']))
 
     # Tab 2: Top keywords
     with tab2:
         st.header("Top Mots-clés par Catégorie")
 
-        # Calculate average interest per keyword over the period
+        # Average and max interest per keyword are aggregated (and sorted)
+        # in SQL, for all selected categories in a single query
+        all_keyword_stats = load_keyword_stats(tuple(selected_categories), days_back=days_back)
+
         for category in selected_categories:
-            category_data = all_data[all_data['category'] == category]
+            keyword_stats = all_keyword_stats[all_keyword_stats['category'] == category]
 
-            if not category_data.empty:
+            if not keyword_stats.empty:
                 st.subheader(category_labels.get(category, category))
 
-                # Calculate average and max interest
-                keyword_stats = category_data.groupby('keyword').agg({
-                    'interest': ['mean', 'max']
-                }).round(1)
-
+                keyword_stats = keyword_stats.drop(columns='category').set_index('keyword').round(1)
                 keyword_stats.columns = ['Intérêt moyen', 'Intérêt max']
-                keyword_stats = keyword_stats.sort_values('Intérêt moyen', ascending=False)
 
                 # Bar chart
                 fig = go.Figure()
@@ -288,7 +372,7 @@ def main():
         st.header("Comparaison entre Catégories")
 
         # Calculate average interest per category over time
-        category_comparison = all_data.groupby(['date', 'category'])['interest'].mean().reset_index()
+        category_comparison = load_daily_category_means(tuple(selected_categories), days_back=days_back)
 
         fig = px.line(
             category_comparison,
@@ -308,49 +392,57 @@ def main():
 
         cols = st.columns(len(selected_categories))
 
+        # Trend = last 30 days vs previous 30 days, using date-based windows
+        # (not data point counts) to handle weekly vs daily data properly.
+        # Windows are computed in SQL from each category's most recent date.
+        trend_windows = load_trend_windows(
+            tuple(selected_categories), days_back=days_back
+        ).set_index('category')
+
         for idx, category in enumerate(selected_categories):
             with cols[idx]:
-                cat_data = all_data[all_data['category'] == category]
-                avg_interest = cat_data['interest'].mean()
-
                 st.markdown(f"**{category_labels.get(category, category)}**")
-                st.metric("Intérêt moyen", f"{avg_interest:.1f}")
-
-                # Calculate trend (last 30 days vs previous 30 days)
-                # Use actual date-based filtering instead of data point count
-                # to handle weekly vs daily data properly
-                if not cat_data.empty:
-                    # Get the most recent date in the data
-                    max_date = cat_data['date'].max()
-                    
-                    # Define date ranges
-                    recent_start = max_date - pd.Timedelta(days=30)
-                    older_start = max_date - pd.Timedelta(days=60)
-                    older_end = recent_start
-                    
-                    # Filter data by date ranges
-                    recent_data = cat_data[cat_data['date'] > recent_start]
-                    older_data = cat_data[(cat_data['date'] > older_start) & (cat_data['date'] <= older_end)]
-                    
-                    # Calculate trend if we have data in both periods
-                    if len(recent_data) > 0 and len(older_data) > 0:
-                        recent_avg = recent_data['interest'].mean()
-                        older_avg = older_data['interest'].mean()
-                        trend = ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
-                        st.metric("Tendance 30j", f"{trend:+.1f}%")
+
+                if category not in trend_windows.index:
+                    continue
+
+                windows = trend_windows.loc[category]
+                st.metric("Intérêt moyen", f"{windows['avg_interest']:.1f}")
+
+                # Calculate trend if we have data in both periods
+                if pd.notna(windows['recent_avg']) and pd.notna(windows['older_avg']):
+                    recent_avg = windows['recent_avg']
+                    older_avg = windows['older_avg']
+                    trend = ((recent_avg - older_avg) / older_avg * 100) if older_avg > 0 else 0
+                    st.metric("Tendance 30j", f"{trend:+.1f}%")
 
     # Tab 4: Raw data
     with tab4:
         st.header("Données Brutes")
 
+        # The packed series already loaded for the charts hold keyword,
+        # category, date and interest; the full trends_data rows are only
+        # read when asked for
+        show_all_columns = st.checkbox(
+            "Afficher toutes les colonnes (id, geo, date de collecte)",
+            value=False
+        )
+        if show_all_columns:
+            raw_data = load_raw_trends_data(tuple(selected_categories), days_back=days_back)
+        else:
+            raw_data = all_data
+
+        # Sort once with a fresh RangeIndex; the CSV export reuses this frame
+        raw_data = raw_data.sort_values('date', ascending=False, ignore_index=True)
+
         st.dataframe(
-            all_data.sort_values('date', ascending=False),
+            raw_data,
             use_container_width=True,
             height=500
         )
 
         # Download button
-        csv = all_data.to_csv(index=False).encode('utf-8')
+        csv = to_csv_bytes(raw_data)
         st.download_button(
             label="📥 Télécharger les données (CSV)",
             data=csv,
@@ -4,13 +4,56 @@ Uses SQLite for local storage of Google Trends data.
 """
 
 import sqlite3
+import json
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
+import numpy as np
 import pandas as pd
 
 
+# Marker for dates without a value in a packed series (interest is 0-100)
+SERIES_MISSING = 255
+
+
+def _pack_series(dates: np.ndarray, values: np.ndarray) -> Tuple[str, int, int, bytes]:
+    """
+    Pack a sorted daily/weekly series into a uint8 buffer.
+
+    Args:
+        dates: Sorted datetime64[D] array
+        values: Interest values aligned with dates
+
+    Returns:
+        (start_date, step_days, length, blob) where position i of the blob
+        holds the value for start_date + i * step_days
+    """
+    offsets = (dates - dates[0]).astype(np.int64)
+    step = int(np.gcd.reduce(offsets)) or 1
+    packed = np.full(offsets[-1] // step + 1, SERIES_MISSING, dtype=np.uint8)
+    packed[offsets // step] = values
+    return str(dates[0]), step, len(packed), packed.tobytes()
+
+
+def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink a trends DataFrame in place.
+
+    Repeated labels become categoricals (small integer codes + one copy of
+    each string) and interest, always 0-100, fits in int16.
+    """
+    for column in ('keyword', 'category', 'geo'):
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    df['interest'] = df['interest'].astype('int16')
+    return df
+
+
 class TrendsDatabase:
     """Manages SQLite database for trends data storage."""
 
@@ -24,12 +67,66 @@ class TrendsDatabase:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self.logger = logging.getLogger(__name__)
+
+        # One shared connection for the lifetime of the instance; the lock
+        # serializes access since the dashboard calls in from several threads
+        self._lock = threading.Lock()
+        self._conn = self._connect()
         self._init_database()
 
+        # Memoized lookups, cleared whenever this instance inserts data or
+        # PRAGMA data_version shows another connection committed a write.
+        # Kept per instance so the caches don't hold other instances alive.
+        self._latest_collection_date = lru_cache(maxsize=256)(
+            self._query_latest_collection_date
+        )
+        self._all_keywords = lru_cache(maxsize=1)(self._query_all_keywords)
+        self._data_version = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the per-connection PRAGMAs applied."""
+        # PARSE_COLNAMES lets queries request typed values with an
+        # 'AS "name [timestamp]"' alias without converting every bulk row
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            detect_types=sqlite3.PARSE_COLNAMES
+        )
+        conn.executescript("""
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+            PRAGMA cache_size=-65536;
+            PRAGMA foreign_keys=ON;
+            PRAGMA busy_timeout=5000;
+        """)
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in a single write transaction."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+                cursor.execute("COMMIT")
+            except BaseException:
+                # Also covers a failed COMMIT, which would otherwise leave
+                # the shared connection stuck inside the transaction
+                if self._conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                raise
+
     def _init_database(self):
         """Create database tables if they don't exist."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        # WAL is persistent in the database file: readers (dashboard) no
+        # longer block the writer (collection) and commits fsync less often
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+
+        with self._transaction() as cursor:
 
             # Table for trends data
             cursor.execute("""
@@ -53,7 +150,38 @@ class TrendsDatabase:
                     keywords_collected TEXT,
                     success BOOLEAN,
                     error_message TEXT,
-                    records_inserted INTEGER DEFAULT 0
+                    records_inserted INTEGER DEFAULT 0,
+                    failed_keywords TEXT
+                )
+            """)
+
+            # Databases created before failed_keywords (JSON array) existed
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(collection_metadata)")}
+            if 'failed_keywords' not in columns:
+                cursor.execute("ALTER TABLE collection_metadata ADD COLUMN failed_keywords TEXT")
+
+            # Packed copy of trends_data: one row per keyword whose interest
+            # column is a uint8 buffer (see _pack_series). trends_data stays
+            # the source of truth and the series are rebuilt from it on insert.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS trends_series (
+                    keyword TEXT PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    start_date DATE NOT NULL,
+                    step_days INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    interest BLOB NOT NULL
+                )
+            """)
+
+            # Materialized average interest per (category, date), kept up to
+            # date by insert_trends_data for the dashboard's category comparison
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS trends_daily_category_mean (
+                    category TEXT NOT NULL,
+                    date DATE NOT NULL,
+                    interest REAL NOT NULL,
+                    PRIMARY KEY (category, date)
                 )
             """)
 
@@ -63,24 +191,128 @@ class TrendsDatabase:
                 ON trends_data(keyword, date)
             """)
 
+            # Covering index for the category-filtered dashboard queries:
+            # keyword and interest are read from the index, not the table.
+            # It subsumes the former (category, date) index.
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_category_date
-                ON trends_data(category, date)
+                CREATE INDEX IF NOT EXISTS idx_cat_date_cover
+                ON trends_data(category, date, keyword, interest)
             """)
 
+            cursor.execute("DROP INDEX IF EXISTS idx_category_date")
+
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_collected_at
                 ON trends_data(collected_at)
             """)
 
-            conn.commit()
-            self.logger.info(f"Database initialized at {self.db_path}")
+            # Backfill the packed series for databases created before they existed
+            cursor.execute("""
+                SELECT EXISTS(SELECT 1 FROM trends_data)
+                   AND NOT EXISTS(SELECT 1 FROM trends_series)
+            """)
+            if cursor.fetchone()[0]:
+                self._refresh_series(cursor)
+
+            # Same for the materialized category means
+            cursor.execute("""
+                SELECT EXISTS(SELECT 1 FROM trends_data)
+                   AND NOT EXISTS(SELECT 1 FROM trends_daily_category_mean)
+            """)
+            if cursor.fetchone()[0]:
+                self._refresh_daily_category_means(cursor)
+
+        self.logger.info(f"Database initialized at {self.db_path}")
+
+    def _refresh_series(self, cursor: sqlite3.Cursor, keyword: Optional[str] = None):
+        """
+        Rebuild packed series from trends_data.
+
+        Args:
+            cursor: Cursor inside an open write transaction
+            keyword: Keyword to rebuild (default: all keywords)
+        """
+        query = "SELECT keyword, category, date, interest FROM trends_data"
+        params = []
+
+        if keyword is not None:
+            query += " WHERE keyword = ?"
+            params.append(keyword)
+
+        query += " ORDER BY keyword, date"
+        rows = pd.DataFrame(
+            cursor.execute(query, params).fetchall(),
+            columns=['keyword', 'category', 'date', 'interest']
+        )
+
+        series = []
+        for name, group in rows.groupby('keyword', sort=False):
+            dates = group['date'].to_numpy(dtype='datetime64[D]')
+            packed = _pack_series(dates, group['interest'].to_numpy(dtype=np.uint8))
+            series.append((name, group['category'].iloc[-1], *packed))
+
+        cursor.executemany("""
+            INSERT OR REPLACE INTO trends_series
+            (keyword, category, start_date, step_days, length, interest)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, series)
+
+    def _refresh_daily_category_means(
+        self,
+        cursor: sqlite3.Cursor,
+        category: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ):
+        """
+        Recompute materialized category means from trends_data.
+
+        Mean rows in the refreshed range whose (category, date) group no
+        longer has any trends_data rows are deleted.
+
+        Args:
+            cursor: Cursor inside an open write transaction
+            category: Category to refresh (default: all categories)
+            start_date: First date to refresh (YYYY-MM-DD)
+            end_date: Last date to refresh (YYYY-MM-DD)
+        """
+        where = ""
+        params = []
+
+        if category is not None:
+            where += " AND category = ?"
+            params.append(category)
+
+        if start_date:
+            where += " AND date >= ?"
+            params.append(start_date)
+
+        if end_date:
+            where += " AND date <= ?"
+            params.append(end_date)
+
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO trends_daily_category_mean (category, date, interest)
+            SELECT category, date, AVG(interest)
+            FROM trends_data
+            WHERE 1=1{where}
+            GROUP BY category, date
+        """, params)
+
+        cursor.execute(f"""
+            DELETE FROM trends_daily_category_mean
+            WHERE NOT EXISTS (
+                SELECT 1 FROM trends_data t
+                WHERE t.category = trends_daily_category_mean.category
+                AND t.date = trends_daily_category_mean.date
+            ){where}
+        """, params)
 
     def insert_trends_data(
         self,
         keyword: str,
         category: str,
-        data: pd.DataFrame
+        data: Union[pd.DataFrame, pd.Series]
     ) -> int:
         """
         Insert trends data for a specific keyword.
@@ -88,34 +320,92 @@ class TrendsDatabase:
         Args:
             keyword: The search keyword
             category: Category (meubles, electromenagers, etc.)
-            data: DataFrame with date index and interest values
+            data: Series of interest values, or DataFrame with an interest
+                column (the keyword's, else the first), with a date index
 
         Returns:
             Number of records inserted
         """
-        records_inserted = 0
-
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            for date, row in data.iterrows():
-                try:
-                    interest_value = int(row.get(keyword, row.iloc[0]))
-
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO trends_data
-                        (keyword, category, date, interest, geo)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (keyword, category, date.strftime('%Y-%m-%d'),
-                          interest_value, 'CA-QC'))
-
-                    records_inserted += 1
+        if isinstance(data, pd.Series):
+            values = data
+        else:
+            values = data[keyword] if keyword in data.columns else data.iloc[:, 0]
+        valid = values.dropna()
+        if len(valid) < len(values):
+            self.logger.warning(
+                f"Skipping {len(values) - len(valid)} missing values for '{keyword}'"
+            )
+
+        timestamps = valid.index.values.astype('datetime64[s]').astype(np.int64)
+        return self.insert_trends_rows(keyword, category, timestamps, valid.to_numpy())
+
+    def insert_trends_rows(
+        self,
+        keyword: str,
+        category: str,
+        timestamps: np.ndarray,
+        interest: np.ndarray
+    ) -> int:
+        """
+        Insert pre-serialized trends data for a specific keyword.
 
-                except Exception as e:
-                    self.logger.error(f"Error inserting data for {keyword} on {date}: {e}")
+        Args:
+            keyword: The search keyword
+            category: Category (meubles, electromenagers, etc.)
+            timestamps: Epoch seconds of each data point
+            interest: Interest values aligned with timestamps (e.g. int16)
 
-            conn.commit()
+        Returns:
+            Number of records inserted
 
+        Raises:
+            ValueError: If an interest value is outside 0-254 (the packed
+                uint8 series reserve 255 for missing dates)
+        """
+        interest = np.asarray(interest)
+        if interest.size and (interest.min() < 0 or interest.max() >= SERIES_MISSING):
+            raise ValueError(
+                f"Interest values for '{keyword}' must be in [0, {SERIES_MISSING}), "
+                f"got [{interest.min()}, {interest.max()}]"
+            )
+
+        dates = (
+            np.asarray(timestamps, dtype='datetime64[s]')
+            .astype('datetime64[D]')
+            .astype(str)
+            .tolist()
+        )
+        values = np.asarray(interest).astype(np.int64).tolist()
+
+        # Columns are zipped at C level and sent through a single prepared
+        # statement instead of one execute() per date
+        rows = zip(repeat(keyword), repeat(category), dates, values, repeat('CA-QC'))
+
+        with self._transaction() as cursor:
+            # Rows replaced below may belong to other categories (the keyword
+            # moved); their means have to be recomputed too
+            if dates:
+                start_date, end_date = min(dates), max(dates)
+                cursor.execute("""
+                    SELECT DISTINCT category FROM trends_data
+                    WHERE keyword = ? AND date BETWEEN ? AND ? AND category != ?
+                """, (keyword, start_date, end_date, category))
+                categories = [category] + [row[0] for row in cursor.fetchall()]
+
+            cursor.executemany("""
+                INSERT OR REPLACE INTO trends_data
+                (keyword, category, date, interest, geo)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            self._refresh_series(cursor, keyword)
+            if dates:
+                for refreshed in categories:
+                    self._refresh_daily_category_means(cursor, refreshed, start_date, end_date)
+
+        # data_version ignores this connection's own commits
+        self._clear_caches()
+
+        records_inserted = len(dates)
         self.logger.info(f"Inserted {records_inserted} records for '{keyword}'")
         return records_inserted
 
@@ -124,7 +414,8 @@ class TrendsDatabase:
         keywords: List[str],
         success: bool,
         records_inserted: int = 0,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        failed_keywords: Optional[List[str]] = None
     ):
         """
         Log metadata about a collection run.
@@ -134,22 +425,24 @@ class TrendsDatabase:
             success: Whether collection was successful
             records_inserted: Number of records added
             error_message: Error message if failed
+            failed_keywords: Keywords that could not be collected, stored as
+                a JSON array (query with json_each)
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        failed = json.dumps(failed_keywords, ensure_ascii=False) if failed_keywords else None
+        with self._transaction() as cursor:
             cursor.execute("""
                 INSERT INTO collection_metadata
-                (keywords_collected, success, error_message, records_inserted)
-                VALUES (?, ?, ?, ?)
-            """, (', '.join(keywords), success, error_message, records_inserted))
-            conn.commit()
+                (keywords_collected, success, error_message, records_inserted, failed_keywords)
+                VALUES (?, ?, ?, ?, ?)
+            """, (', '.join(keywords), success, error_message, records_inserted, failed))
 
     def get_trends_data(
         self,
         keywords: Optional[List[str]] = None,
         category: Optional[str] = None,
         start_date: Optional[str] = None,
-        end_date: Optional[str] = None
+        end_date: Optional[str] = None,
+        categories: Optional[List[str]] = None
     ) -> pd.DataFrame:
         """
         Retrieve trends data from database.
@@ -159,6 +452,7 @@ class TrendsDatabase:
             category: Filter by category
             start_date: Start date (YYYY-MM-DD)
             end_date: End date (YYYY-MM-DD)
+            categories: Filter by several categories at once
 
         Returns:
             DataFrame with trends data
@@ -175,6 +469,11 @@ class TrendsDatabase:
             query += " AND category = ?"
             params.append(category)
 
+        if categories:
+            placeholders = ','.join(['?' for _ in categories])
+            query += f" AND category IN ({placeholders})"
+            params.extend(categories)
+
         if start_date:
             query += " AND date >= ?"
             params.append(start_date)
@@ -185,11 +484,254 @@ class TrendsDatabase:
 
         query += " ORDER BY date, keyword"
 
-        with sqlite3.connect(self.db_path) as conn:
-            df = pd.read_sql_query(query, conn, params=params)
-            if not df.empty:
-                df['date'] = pd.to_datetime(df['date'])
-            return df
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=params)
+
+        if not df.empty:
+            df['date'] = pd.to_datetime(df['date'])
+        return _compact_dtypes(df)
+
+    def get_trends_series(
+        self,
+        keywords: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Retrieve trends data from the packed per-keyword series.
+
+        Reads one row per keyword instead of one per (keyword, date), which
+        is much cheaper than get_trends_data for the dashboard's range loads.
+
+        Args:
+            keywords: Filter by specific keywords
+            categories: Filter by categories
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Returns:
+            DataFrame with keyword, category, date and interest columns,
+            ordered by keyword then date
+        """
+        query = """
+            SELECT keyword, category, start_date, step_days, interest
+            FROM trends_series WHERE 1=1
+        """
+        params = []
+
+        if keywords:
+            placeholders = ','.join(['?' for _ in keywords])
+            query += f" AND keyword IN ({placeholders})"
+            params.extend(keywords)
+
+        if categories:
+            placeholders = ','.join(['?' for _ in categories])
+            query += f" AND category IN ({placeholders})"
+            params.extend(categories)
+
+        query += " ORDER BY keyword"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        if not rows:
+            return _compact_dtypes(
+                pd.DataFrame(columns=['keyword', 'category', 'date', 'interest'])
+            )
+
+        start = np.datetime64(start_date, 'D') if start_date else None
+        end = np.datetime64(end_date, 'D') if end_date else None
+
+        names, cats, dates, values = [], [], [], []
+        for keyword, category, series_start, step_days, blob in rows:
+            interest = np.frombuffer(blob, dtype=np.uint8)
+            series_dates = (
+                np.datetime64(series_start, 'D')
+                + np.arange(len(interest)) * np.timedelta64(step_days, 'D')
+            )
+
+            mask = interest != SERIES_MISSING
+            if start is not None:
+                mask &= series_dates >= start
+            if end is not None:
+                mask &= series_dates <= end
+
+            count = int(mask.sum())
+            names.append(np.full(count, keyword, dtype=object))
+            cats.append(np.full(count, category, dtype=object))
+            dates.append(series_dates[mask])
+            values.append(interest[mask])
+
+        return _compact_dtypes(pd.DataFrame({
+            'keyword': np.concatenate(names),
+            'category': np.concatenate(cats),
+            'date': np.concatenate(dates).astype('datetime64[ns]'),
+            'interest': np.concatenate(values)
+        }))
+
+    def get_category_keyword_stats(
+        self,
+        categories: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Get average and maximum interest per keyword for several categories.
+
+        Args:
+            categories: Categories to aggregate
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Returns:
+            DataFrame with category, keyword, avg_interest and max_interest
+            columns, sorted by average interest (descending) within each category
+        """
+        placeholders = ','.join(['?' for _ in categories])
+        query = f"""
+            SELECT category, keyword,
+                   AVG(interest) AS avg_interest, MAX(interest) AS max_interest
+            FROM trends_data
+            WHERE category IN ({placeholders})
+        """
+        params = list(categories)
+
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+
+        query += " GROUP BY category, keyword ORDER BY category, avg_interest DESC"
+
+        with self._lock:
+            return pd.read_sql_query(query, self._conn, params=params)
+
+    def get_daily_category_means(
+        self,
+        categories: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Get the average interest per date for each category.
+
+        Reads the pre-aggregated trends_daily_category_mean table, so only
+        one row per (date, category) is transferred.
+
+        Args:
+            categories: Categories to load
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Returns:
+            DataFrame with date, category and interest columns
+        """
+        placeholders = ','.join(['?' for _ in categories])
+        query = f"""
+            SELECT date, category, interest
+            FROM trends_daily_category_mean
+            WHERE category IN ({placeholders})
+        """
+        params = list(categories)
+
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+
+        if end_date:
+            query += " AND date <= ?"
+            params.append(end_date)
+
+        query += " ORDER BY date, category"
+
+        with self._lock:
+            df = pd.read_sql_query(query, self._conn, params=params)
+
+        if not df.empty:
+            df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def get_trend_windows(
+        self,
+        categories: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Get the 30-day trend windows for each category.
+
+        Windows are anchored on each category's most recent date in the
+        range, so weekly and daily data are compared over the same spans:
+        recent is (max - 30d, max], older is (max - 60d, max - 30d].
+
+        Args:
+            categories: Categories to compute windows for
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Returns:
+            DataFrame with category, avg_interest (whole range), recent_avg
+            and older_avg columns; window averages are NaN when empty
+        """
+        placeholders = ','.join(['?' for _ in categories])
+        bounds_filter = ""
+        window_filter = ""
+        range_params = []
+
+        if start_date:
+            bounds_filter += " AND date >= ?"
+            window_filter += " AND t.date >= ?"
+            range_params.append(start_date)
+
+        if end_date:
+            bounds_filter += " AND date <= ?"
+            window_filter += " AND t.date <= ?"
+            range_params.append(end_date)
+
+        query = f"""
+            WITH bounds AS (
+                SELECT category, MAX(date) AS max_date, AVG(interest) AS avg_interest
+                FROM trends_data
+                WHERE category IN ({placeholders}){bounds_filter}
+                GROUP BY category
+            )
+            SELECT
+                b.category,
+                b.avg_interest,
+                AVG(CASE WHEN t.date > date(b.max_date, '-30 days')
+                    THEN t.interest END) AS recent_avg,
+                AVG(CASE WHEN t.date <= date(b.max_date, '-30 days')
+                    THEN t.interest END) AS older_avg
+            FROM bounds b
+            JOIN trends_data t
+                ON t.category = b.category
+                AND t.date > date(b.max_date, '-60 days')
+                AND t.date <= b.max_date
+            WHERE 1=1{window_filter}
+            GROUP BY b.category
+        """
+        params = list(categories) + range_params + range_params
+
+        with self._lock:
+            return pd.read_sql_query(query, self._conn, params=params)
+
+    def _clear_caches(self):
+        """Drop every memoized lookup."""
+        self._latest_collection_date.cache_clear()
+        self._all_keywords.cache_clear()
+
+    def _check_data_version(self):
+        """Clear the caches if another connection has committed since the last check."""
+        # A single-page read, far cheaper than the queries it guards
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._data_version = data_version
+                self._clear_caches()
 
     def get_latest_collection_date(self, keyword: str) -> Optional[datetime]:
         """
@@ -201,53 +743,84 @@ class TrendsDatabase:
         Returns:
             Most recent collection datetime or None
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        self._check_data_version()
+        return self._latest_collection_date(keyword)
+
+    def _query_latest_collection_date(self, keyword: str) -> Optional[datetime]:
+        """Query the most recent collection date for a keyword."""
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute("""
-                SELECT MAX(collected_at)
+                SELECT MAX(collected_at) AS "latest [timestamp]"
                 FROM trends_data
                 WHERE keyword = ?
             """, (keyword,))
 
-            result = cursor.fetchone()[0]
-            if result:
-                return datetime.fromisoformat(result)
-            return None
+            return cursor.fetchone()[0]
 
     def get_all_keywords(self) -> List[str]:
         """Get list of all keywords in database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        self._check_data_version()
+        return list(self._all_keywords())
+
+    def _query_all_keywords(self) -> tuple:
+        """Query all keywords in database."""
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute("SELECT DISTINCT keyword FROM trends_data ORDER BY keyword")
-            return [row[0] for row in cursor.fetchall()]
+            return tuple(row[0] for row in cursor.fetchall())
+
+    def get_latest_dates_bulk(self) -> Dict[str, str]:
+        """
+        Get the most recent data date of every keyword in one query.
+
+        Returns:
+            Dictionary mapping keyword to its latest date (YYYY-MM-DD)
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("SELECT keyword, MAX(date) FROM trends_data GROUP BY keyword")
+            return dict(cursor.fetchall())
+
+    def get_latest_collection_dates(self) -> Dict[str, datetime]:
+        """
+        Get the most recent collection date of every keyword in one query.
+
+        Returns:
+            Dictionary mapping keyword to its latest collection datetime
+            (see get_latest_collection_date)
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("""
+                SELECT keyword, MAX(collected_at) AS "latest [timestamp]"
+                FROM trends_data
+                GROUP BY keyword
+            """)
+            return dict(cursor.fetchall())
 
     def get_categories(self) -> List[str]:
         """Get list of all categories in database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute("SELECT DISTINCT category FROM trends_data ORDER BY category")
             return [row[0] for row in cursor.fetchall()]
 
     def get_summary_stats(self) -> Dict[str, Any]:
         """Get summary statistics about the database."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            # Total records
-            cursor.execute("SELECT COUNT(*) FROM trends_data")
-            total_records = cursor.fetchone()[0]
+        with self._lock:
+            cursor = self._conn.cursor()
 
-            # Unique keywords
-            cursor.execute("SELECT COUNT(DISTINCT keyword) FROM trends_data")
-            unique_keywords = cursor.fetchone()[0]
-
-            # Date range
-            cursor.execute("SELECT MIN(date), MAX(date) FROM trends_data")
-            date_range = cursor.fetchone()
+            # Record count, unique keywords and date range in a single scan
+            cursor.execute("""
+                SELECT COUNT(*), COUNT(DISTINCT keyword), MIN(date), MAX(date)
+                FROM trends_data
+            """)
+            total_records, unique_keywords, *date_range = cursor.fetchone()
 
             # Last collection
             cursor.execute("""
-                SELECT MAX(collection_date)
+                SELECT MAX(collection_date) AS "last_collection [timestamp]"
                 FROM collection_metadata
                 WHERE success = 1
             """)
@@ -256,7 +829,7 @@ class TrendsDatabase:
             return {
                 'total_records': total_records,
                 'unique_keywords': unique_keywords,
-                'date_range': date_range,
+                'date_range': tuple(date_range),
                 'last_successful_collection': last_collection
             }
 
@@ -276,17 +849,31 @@ class TrendsDatabase:
         backup_path = Path(backup_path)
         backup_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with sqlite3.connect(self.db_path) as source:
-            with sqlite3.connect(backup_path) as target:
-                source.backup(target)
+        target = sqlite3.connect(backup_path)
+        try:
+            with self._lock:
+                self._conn.backup(target)
+        finally:
+            target.close()
 
         self.logger.info(f"Database backed up to {backup_path}")
         return str(backup_path)
 
     def close(self):
-        """Close database connection."""
+        """Close database connection (safe to call more than once)."""
+        # The per-instance caches reference this instance's bound methods;
+        # clearing them drops what they hold without waiting for cyclic GC
+        self._clear_caches()
+        with self._lock:
+            self._conn.close()
         self.logger.info("Database connection closed")
 
+    def __enter__(self) -> 'TrendsDatabase':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 
 if __name__ == "__main__":
     # Test database setup
@@ -0,0 +1,91 @@
+"""
+Adaptive token-bucket rate limiter for Google Trends requests.
+The rate is halved on HTTP 429 and recovers additively on success (AIMD).
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every collector worker."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        recovery: float = 0.05,
+        min_rate: float = 0.05,
+        max_backoff: float = 60.0
+    ):
+        """
+        Initialize the bucket (full).
+
+        Args:
+            rate: Maximum requests per second (refill rate cap)
+            burst: Requests that may be sent back to back when idle
+            recovery: Requests per second added back after each success
+            min_rate: Floor for the rate after repeated penalties
+            max_backoff: Longest pause after a 429 (seconds)
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.recovery = recovery
+        self.min_rate = min(min_rate, rate)
+        self.max_backoff = max_backoff
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._penalties = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add the tokens earned since the last update (lock must be held)."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping only for the exact deficit.
+
+        The token is reserved before sleeping so concurrent callers queue up
+        behind each other instead of all waking at once.
+
+        Returns:
+            Seconds slept
+        """
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            self._tokens -= 1
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def record_success(self):
+        """Additively raise the rate back towards its cap."""
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.recovery)
+            self._penalties = 0
+
+    def penalize(self) -> float:
+        """
+        React to a rate-limit response: halve the rate, drop the saved-up
+        burst and back off exponentially with consecutive penalties.
+
+        Returns:
+            Seconds slept
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self._tokens = min(self._tokens, 0.0)
+            self._penalties += 1
+            backoff = min(self.max_backoff, 2 ** (self._penalties - 1) / self.rate)
+
+        time.sleep(backoff)
+        return backoff
@@ -0,0 +1,91 @@
+"""
+Google Trends client sharing one HTTP session across requests.
+pytrends' TrendReq opens a new requests session (and TLS connection) per call.
+"""
+
+import json
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pytrends import exceptions
+from pytrends.request import BASE_TRENDS_URL, TrendReq
+
+
+def create_session(retries: int = 3, backoff_factor: float = 1.5) -> requests.Session:
+    """
+    Create a keep-alive HTTP session with retry and exponential backoff.
+
+    Args:
+        retries: Retries per request on connection errors and 5xx responses
+        backoff_factor: Backoff factor between retries (seconds)
+
+    Returns:
+        Session to share between SessionTrendReq clients
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        # No 429: rate limiting is left to the collector's TokenBucket, and
+        # transport retries would bypass it. urllib3 also retries any 429
+        # carrying Retry-After unless that header is ignored.
+        status_forcelist=[500, 502, 503, 504],
+        respect_retry_after_header=False,
+        allowed_methods=frozenset(['GET', 'POST']),
+        # Hand the last response back so pytrends can raise its own errors
+        raise_on_status=False
+    )
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry))
+    return session
+
+
+class SessionTrendReq(TrendReq):
+    """TrendReq sending every request through an injected requests.Session."""
+
+    def __init__(self, session: requests.Session, **kwargs):
+        """
+        Initialize the client.
+
+        Args:
+            session: Shared session (see create_session)
+            **kwargs: TrendReq arguments (hl, tz, timeout, requests_args...);
+                proxies are not supported
+        """
+        self.session = session
+        super().__init__(**kwargs)
+
+    def GetGoogleCookie(self) -> Dict[str, str]:
+        """Get the Google NID cookie through the shared session."""
+        response = self.session.get(
+            f'{BASE_TRENDS_URL}/explore/?geo={self.hl[-2:]}',
+            timeout=self.timeout,
+            **self.requests_args
+        )
+        return {name: value for name, value in response.cookies.items() if name == 'NID'}
+
+    def _get_data(self, url, method=TrendReq.GET_METHOD, trim_chars=0, **kwargs):
+        """Send a request through the shared session and return the parsed JSON."""
+        send = self.session.post if method == TrendReq.POST_METHOD else self.session.get
+        response = send(
+            url,
+            timeout=self.timeout,
+            cookies=self.cookies,
+            headers=self.headers,
+            **kwargs,
+            **self.requests_args
+        )
+
+        # Google answers with application/json, application/javascript or
+        # text/javascript, sometimes prefixed with garbage characters
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code == 200 and any(
+            kind in content_type
+            for kind in ('application/json', 'application/javascript', 'text/javascript')
+        ):
+            return json.loads(response.text[trim_chars:])
+
+        if response.status_code == requests.codes.too_many_requests:
+            raise exceptions.TooManyRequestsError.from_response(response)
+        raise exceptions.ResponseError.from_response(response)
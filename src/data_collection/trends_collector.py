@@ -3,17 +3,96 @@ Google Trends data collector for Quebec market analysis.
 Collects search trend data for furniture, appliances, mattresses, and flooring sectors.
 """
 
+import asyncio
+import atexit
+import hashlib
+import json
 import logging
+import os
+import queue
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from typing import List, Dict, Optional
 from pathlib import Path
 
 import yaml
+import numpy as np
 import pandas as pd
+from pytrends.exceptions import TooManyRequestsError
 from pytrends.request import TrendReq
 
 from .database import TrendsDatabase
+from .rate_limiter import TokenBucket
+from .trends_client import SessionTrendReq, create_session
+
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml C parser
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+@lru_cache(maxsize=8)
+def _load_config_cached(path: str, mtime_ns: int) -> Dict:
+    """
+    Parse a YAML config file, memoized on its path and modification time.
+
+    The returned dictionary is shared between callers and must not be mutated.
+    """
+    with open(path, 'rb') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+# Collector log file (relative to the working directory)
+LOG_FILE = Path('logs') / 'trends_collector.log'
+
+# Background writer shared by every collector instance, started on first use
+_log_listener: Optional[QueueListener] = None
+
+
+def _start_log_listener(log_file: Optional[Path] = None) -> None:
+    """
+    Route root logging through a queue to a background listener (once).
+
+    Records are written to the console and log file by the listener thread,
+    so collection workers never block on (or contend for) the file handle.
+    Later calls are no-ops: handlers are built, and the log file opened,
+    at most once per process.
+
+    Args:
+        log_file: Log file path (defaults to LOG_FILE)
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    root = logging.getLogger()
+    # Same rule as logging.basicConfig: leave configured loggers alone
+    if root.handlers:
+        return
+
+    log_file = Path(log_file or LOG_FILE)
+    # Create the directory before any handler touches the file
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [
+        logging.StreamHandler(),
+        # delay: the file is only opened when the first record is written
+        logging.FileHandler(log_file, mode='a', delay=True)
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    # Flush pending records on exit
+    atexit.register(_log_listener.stop)
+
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
 
 
 class QuebecTrendsCollector:
@@ -29,38 +108,87 @@ class QuebecTrendsCollector:
         self.logger = self._setup_logging()
         self.config = self._load_config(config_path)
         self.db = TrendsDatabase(self.config['database']['path'])
-        self.pytrends = TrendReq(
+
+        # Settings read on every request, looked up once
+        self._geo = self.config['google_trends']['geo']
+        self._default_timeframe = self.config['google_trends']['timeframe']
+        self._batch_size = min(self.config['collection'].get('batch_size', 5), 5)
+        self._max_concurrent = self.config['collection'].get('max_concurrent_requests', 3)
+        self._last_run_path = Path(self.config['collection'].get('last_run_cache', 'cache/last_run.json'))
+        # Every configured (keyword, category) pair, in config order
+        self._flat_keywords = tuple(
+            (keyword, category)
+            for category, keywords in self.config['keywords'].items()
+            for keyword in keywords or ()
+        )
+        # Fixed request batches per category, cut from the full configured
+        # list: Google scales a request against its batch's peak, so a
+        # keyword must always be requested (and stored) with the same
+        # batch-mates for stored values to stay comparable
+        self._category_batches = {
+            category: tuple(
+                tuple(keywords[i:i + self._batch_size])
+                for i in range(0, len(keywords or ()), self._batch_size)
+            )
+            for category, keywords in self.config['keywords'].items()
+        }
+
+        # One bucket paces every request, whichever worker sends it
+        self.bucket = TokenBucket(
+            rate=self.config['collection'].get('requests_per_second', 1.5),
+            burst=self.config['collection'].get('burst', 3)
+        )
+        # All clients share one keep-alive session (with retry/backoff)
+        self.session = create_session()
+        # TrendReq keeps payload state between build_payload and the data
+        # call, so self.pytrends is for the caller's thread only; concurrent
+        # collection uses the worker pool below
+        self.pytrends = self._create_client()
+        # Worker clients, created on first use and reused by later runs
+        self._client_pool: List[TrendReq] = []
+
+    def _create_client(self) -> TrendReq:
+        """Create a Google Trends client on the shared HTTP session."""
+        return SessionTrendReq(
+            self.session,
             hl=self.config['google_trends']['language'],
             tz=360  # UTC-6 for Quebec
         )
 
+    def _get_worker_clients(self, count: int) -> List[TrendReq]:
+        """
+        Get worker clients from the pool, creating the missing ones.
+
+        Args:
+            count: Number of clients needed
+
+        Returns:
+            List of `count` distinct clients
+        """
+        while len(self._client_pool) < count:
+            self._client_pool.append(self._create_client())
+        return self._client_pool[:count]
+
     def _setup_logging(self) -> logging.Logger:
-        """Configure logging for the collector."""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler(),
-                logging.FileHandler('logs/trends_collector.log', mode='a')
-            ]
-        )
-        # Create logs directory if it doesn't exist
-        Path('logs').mkdir(exist_ok=True)
+        """Configure logging for the collector (see _start_log_listener)."""
+        _start_log_listener()
         return logging.getLogger(__name__)
 
     def _load_config(self, config_path: str) -> Dict:
-        """Load configuration from YAML file."""
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-        self.logger.info(f"Configuration loaded from {config_path}")
+        """Load configuration from YAML file (re-parsed only when it changes)."""
+        path = os.path.abspath(config_path)
+        config = _load_config_cached(path, os.stat(path).st_mtime_ns)
+        self.logger.info("Configuration loaded from %s", config_path)
         return config
 
     def collect_keyword_data(
         self,
         keyword: str,
         category: str,
-        timeframe: Optional[str] = None
-    ) -> Optional[pd.DataFrame]:
+        timeframe: Optional[str] = None,
+        *,
+        pytrends: Optional[TrendReq] = None
+    ) -> Optional[pd.Series]:
         """
         Collect Google Trends data for a single keyword.
 
@@ -68,147 +196,377 @@ class QuebecTrendsCollector:
             keyword: Search term to collect data for
             category: Category (meubles, electromenagers, matelas, couvre_planchers)
             timeframe: Time period (e.g., 'today 12-m', 'today 3-m')
+            pytrends: Client to use instead of self.pytrends; TrendReq keeps
+                payload state between calls, so concurrent callers each need
+                their own
+
+        Returns:
+            Series of interest values (named after the keyword) with a date
+            index, or None if failed
+        """
+        results = self.collect_keyword_batch([keyword], category, timeframe, pytrends=pytrends)
+        return results.get(keyword)
+
+    def collect_keyword_batch(
+        self,
+        keywords: List[str],
+        category: str,
+        timeframe: Optional[str] = None,
+        *,
+        pytrends: Optional[TrendReq] = None
+    ) -> Dict[str, pd.Series]:
+        """
+        Collect Google Trends data for up to 5 keywords in one request.
+
+        Google Trends scales every series of a request against the highest
+        point across all of its keywords, so values are comparable within a
+        batch but a keyword no longer necessarily peaks at 100 on its own.
+
+        Args:
+            keywords: Search terms to collect data for (at most 5)
+            category: Category (meubles, electromenagers, matelas, couvre_planchers)
+            timeframe: Time period (e.g., 'today 12-m', 'today 3-m')
+            pytrends: Client to use instead of self.pytrends (see collect_keyword_data)
 
         Returns:
-            DataFrame with date index and interest values, or None if failed
+            Dictionary mapping each keyword that returned data to its Series
+            of interest values (a view on the response frame) with a date index
         """
         if timeframe is None:
-            timeframe = self.config['google_trends']['timeframe']
+            timeframe = self._default_timeframe
+
+        client = pytrends or self.pytrends
 
         try:
-            self.logger.info(f"Collecting data for '{keyword}' ({category})")
+            self.logger.info("Collecting data for %s (%s)", keywords, category)
+
+            # Wait for the rate limiter (returns immediately when under budget)
+            self.bucket.acquire()
 
             # Build payload
-            self.pytrends.build_payload(
-                kw_list=[keyword],
-                geo=self.config['google_trends']['geo'],
+            client.build_payload(
+                kw_list=list(keywords),
+                geo=self._geo,
                 timeframe=timeframe
             )
 
             # Get interest over time
-            data = self.pytrends.interest_over_time()
+            data = client.interest_over_time()
+            self.bucket.record_success()
+
+        except TooManyRequestsError as e:
+            self.logger.warning("Rate limited while collecting %s: %s", keywords, e)
+            backoff = self.bucket.penalize()
+            self.logger.warning(
+                "Request rate lowered to %.2f/s after %.1fs backoff", self.bucket.rate, backoff
+            )
+            return {}
+
+        except Exception as e:
+            self.logger.error("Error collecting data for %s: %s", keywords, e)
+            return {}
 
+        # Clean data in place (once per batch, no per-keyword frame copies)
+        if 'isPartial' in data.columns:
+            data.drop(columns='isPartial', inplace=True)
+        data.index.rename('date', inplace=True)
+
+        results = {}
+        for keyword in keywords:
             if data.empty or keyword not in data.columns:
-                self.logger.warning(f"No data returned for '{keyword}'")
-                return None
+                self.logger.warning("No data returned for '%s'", keyword)
+                continue
 
-            # Clean data
-            data = data[[keyword]]  # Keep only the keyword column
-            data.index.name = 'date'
+            keyword_data = data[keyword]
 
-            self.logger.info(f"Successfully collected {len(data)} records for '{keyword}'")
-            return data
+            self.logger.info("Successfully collected %d records for '%s'", len(keyword_data), keyword)
+            results[keyword] = keyword_data
 
-        except Exception as e:
-            self.logger.error(f"Error collecting data for '{keyword}': {e}")
-            return None
+        return results
+
+    def _store_keyword_data(self, keyword: str, category: str, data: pd.Series) -> int:
+        """
+        Store collected data through the database's bulk insert path.
 
-    def collect_category(self, category: str, delay: Optional[int] = None) -> Dict:
+        Args:
+            keyword: The search keyword
+            category: Category of the keyword
+            data: Series returned by collect_keyword_batch
+
+        Returns:
+            Number of records inserted
+        """
+        # Epoch seconds + int16 (Google Trends values are 0-100)
+        timestamps = data.index.values.astype('datetime64[s]').astype(np.int64)
+        interest = data.to_numpy(dtype=np.int16)
+        return self.db.insert_trends_rows(keyword, category, timestamps, interest)
+
+    def _filter_fresh_keywords(
+        self,
+        keywords: List[str],
+        latest_dates: Dict[str, str]
+    ) -> List[str]:
+        """
+        Drop keywords whose latest data point is within the freshness window.
+
+        Args:
+            keywords: Candidate keywords
+            latest_dates: Latest data date per keyword (YYYY-MM-DD)
+
+        Returns:
+            Keywords that still need to be collected
+        """
+        freshness_days = self.config['collection'].get('freshness_days', 7)
+        cutoff = (datetime.now() - timedelta(days=freshness_days)).strftime('%Y-%m-%d')
+        return [kw for kw in keywords if latest_dates.get(kw, '') < cutoff]
+
+    async def collect_category(
+        self,
+        category: str,
+        latest_dates: Optional[Dict[str, str]] = None
+    ) -> Dict:
         """
         Collect data for all keywords in a category.
 
+        Keywords are requested in fixed batches of collection.batch_size (at
+        most 5, see collect_keyword_batch) cut from the configured list, and
+        up to collection.max_concurrent_requests batches are collected at once.
+        Google scales each request against its batch's peak, so keeping the
+        grouping stable keeps stored values comparable from run to run.
+        Each worker takes a TrendReq client from a pool kept on the instance
+        (reused by later categories and runs); requests are paced by the
+        shared token bucket (self.bucket). Blocking HTTP and SQLite calls
+        run in threads so they don't stall the event loop.
+
         Args:
             category: Category name (meubles, electromenagers, etc.)
-            delay: Seconds to wait between requests (respects rate limits)
+            latest_dates: Latest data date per keyword (see
+                TrendsDatabase.get_latest_dates_bulk); batches whose keywords
+                are all still fresh are skipped
 
         Returns:
             Dictionary with collection statistics
         """
-        if delay is None:
-            delay = self.config['collection']['delay_between_requests']
-
         if category not in self.config['keywords']:
-            self.logger.error(f"Category '{category}' not found in config")
+            self.logger.error("Category '%s' not found in config", category)
             return {'success': False, 'error': 'Category not found'}
 
-        keywords = self.config['keywords'][category]
+        all_keywords = self.config['keywords'][category] or []
+
+        # Fixed batches (see _category_batches), never regrouped around
+        # the fresh keywords
+        batches = [list(batch) for batch in self._category_batches[category]]
+        if latest_dates is not None:
+            stale = set(self._filter_fresh_keywords(all_keywords, latest_dates))
+            batches = [batch for batch in batches if stale.intersection(batch)]
+        keywords = [keyword for batch in batches for keyword in batch]
+
+        # Nothing to request (empty category, or every keyword is fresh)
+        if not keywords:
+            if all_keywords:
+                self.logger.info("All %d keywords of %s are fresh", len(all_keywords), category)
+            else:
+                self.logger.warning("Empty category %s", category)
+            return {
+                'category': category,
+                'total_keywords': len(all_keywords),
+                'successful': 0,
+                'failed': 0,
+                'skipped': len(all_keywords),
+                'records_inserted': 0,
+                'failed_keywords': []
+            }
+
         total_records = 0
         successful_keywords = []
         failed_keywords = []
 
-        self.logger.info(f"Starting collection for category: {category}")
-        self.logger.info(f"Keywords to collect: {len(keywords)}")
+        self.logger.info("Starting collection for category: %s", category)
+        self.logger.info("Keywords to collect: %d", len(keywords))
 
-        for keyword in keywords:
+        if len(keywords) < len(all_keywords):
+            self.logger.info("Skipping %d fresh keywords", len(all_keywords) - len(keywords))
+
+        # The client pool bounds concurrency: a worker must take a client
+        # before sending a request and returns it once the batch is stored
+        workers = min(self._max_concurrent, len(batches))
+        clients = asyncio.Queue()
+        for client in await asyncio.to_thread(self._get_worker_clients, workers):
+            clients.put_nowait(client)
+
+        async def collect_batch(batch: List[str]):
+            nonlocal total_records
+            client = await clients.get()
             try:
-                # Collect data
-                data = self.collect_keyword_data(keyword, category)
+                # Collect data (one request for the whole batch)
+                results = await asyncio.to_thread(
+                    self.collect_keyword_batch, batch, category, pytrends=client
+                )
 
-                if data is not None:
-                    # Store in database
-                    records = self.db.insert_trends_data(keyword, category, data)
-                    total_records += records
-                    successful_keywords.append(keyword)
-                else:
-                    failed_keywords.append(keyword)
+                for keyword in batch:
+                    data = results.get(keyword)
+                    if data is None:
+                        failed_keywords.append(keyword)
+                        continue
 
-                # Respect rate limits
-                time.sleep(delay)
+                    try:
+                        # Store in database
+                        records = await asyncio.to_thread(
+                            self._store_keyword_data, keyword, category, data
+                        )
+                        total_records += records
+                        successful_keywords.append(keyword)
 
-            except Exception as e:
-                self.logger.error(f"Failed to process '{keyword}': {e}")
-                failed_keywords.append(keyword)
+                    except Exception as e:
+                        self.logger.error("Failed to process '%s': %s", keyword, e)
+                        failed_keywords.append(keyword)
+
+            finally:
+                clients.put_nowait(client)
+
+        await asyncio.gather(*(collect_batch(batch) for batch in batches))
+
+        if failed_keywords:
+            self.logger.warning("Failed keywords for %s: %s", category, failed_keywords)
 
         # Log collection metadata
-        success = len(failed_keywords) == 0
         self.db.log_collection(
             keywords=keywords,
-            success=success,
+            success=not failed_keywords,
             records_inserted=total_records,
-            error_message=f"Failed: {failed_keywords}" if failed_keywords else None
+            failed_keywords=failed_keywords
         )
 
         stats = {
             'category': category,
-            'total_keywords': len(keywords),
+            'total_keywords': len(all_keywords),
             'successful': len(successful_keywords),
             'failed': len(failed_keywords),
+            'skipped': len(all_keywords) - len(keywords),
             'records_inserted': total_records,
             'failed_keywords': failed_keywords
         }
 
-        self.logger.info(f"Collection complete for {category}: {stats}")
+        self.logger.info("Collection complete for %s: %s", category, stats)
         return stats
 
-    def collect_all_categories(self) -> Dict:
+    def collect_category_sync(
+        self,
+        category: str,
+        latest_dates: Optional[Dict[str, str]] = None
+    ) -> Dict:
+        """Blocking wrapper around collect_category (see its arguments)."""
+        return asyncio.run(self.collect_category(category, latest_dates))
+
+    def _keywords_hash(self) -> str:
+        """Fingerprint of the configured keywords (invalidates the last-run cache)."""
+        payload = json.dumps(self.config['keywords'], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_last_run(self) -> Optional[Dict]:
+        """
+        Load the stats of the last complete run if it is recent enough to reuse.
+
+        Returns:
+            Cached overall statistics, or None if missing, stale, unreadable
+            or recorded for a different keyword list
+        """
+        try:
+            with open(self._last_run_path, encoding='utf-8') as f:
+                last_run = json.load(f)
+            end_time = datetime.fromisoformat(last_run['stats']['end_time'])
+            if end_time.tzinfo is None:
+                # Written before run times were recorded in UTC (local time)
+                end_time = end_time.astimezone()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # TypeError: valid JSON of the wrong shape (null, a list, a
+            # non-string end_time...)
+            if self._last_run_path.exists():
+                self.logger.warning("Ignoring unreadable last-run cache %s: %s", self._last_run_path, e)
+            return None
+
+        if last_run.get('keywords_hash') != self._keywords_hash():
+            return None
+
+        min_refresh_hours = self.config['collection'].get('min_refresh_hours', 6)
+        if datetime.now(timezone.utc) - end_time >= timedelta(hours=min_refresh_hours):
+            return None
+
+        return last_run['stats']
+
+    def _save_last_run(self, stats: Dict):
+        """Write the stats of a complete run atomically (tmp file + rename)."""
+        self._last_run_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._last_run_path.with_name(self._last_run_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'keywords_hash': self._keywords_hash(), 'stats': stats}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._last_run_path)
+
+    def collect_all_categories(
+        self,
+        latest_dates: Optional[Dict[str, str]] = None,
+        force: bool = False
+    ) -> Dict:
         """
         Collect data for all categories defined in config.
 
+        A run is skipped, and the stats of the previous run returned with
+        'cached': True, if the last run without failures ended less than
+        collection.min_refresh_hours ago (see collection.last_run_cache).
+
+        Args:
+            latest_dates: Latest data date per keyword; when given, keywords
+                that are still fresh are skipped
+            force: Collect even if the last run is recent
+
         Returns:
             Dictionary with overall statistics
         """
+        if not force:
+            cached = self._load_last_run()
+            if cached is not None:
+                self.logger.info("Collection skipped (cached): last run ended at %s", cached['end_time'])
+                return {**cached, 'cached': True}
+
         self.logger.info("=" * 60)
         self.logger.info("Starting full collection run")
         self.logger.info("=" * 60)
 
-        start_time = datetime.now()
+        # Timestamps in UTC for the record, duration from the monotonic clock
+        start_time = datetime.now(timezone.utc).isoformat()
+        start_ns = time.perf_counter_ns()
         all_stats = []
 
         for category in self.config['keywords'].keys():
-            stats = self.collect_category(category)
+            stats = self.collect_category_sync(category, latest_dates=latest_dates)
             all_stats.append(stats)
 
-        end_time = datetime.now()
-        duration = (end_time - start_time).total_seconds()
+        duration = (time.perf_counter_ns() - start_ns) / 1e9
+        end_time = datetime.now(timezone.utc).isoformat()
 
         overall_stats = {
-            'start_time': start_time.isoformat(),
-            'end_time': end_time.isoformat(),
+            'start_time': start_time,
+            'end_time': end_time,
             'duration_seconds': duration,
             'categories_processed': len(all_stats),
             'total_keywords': sum(s['total_keywords'] for s in all_stats),
             'total_successful': sum(s['successful'] for s in all_stats),
             'total_failed': sum(s['failed'] for s in all_stats),
+            'total_skipped': sum(s['skipped'] for s in all_stats),
             'total_records': sum(s['records_inserted'] for s in all_stats),
             'category_stats': all_stats
         }
 
         self.logger.info("=" * 60)
         self.logger.info("Collection run completed")
-        self.logger.info(f"Duration: {duration:.2f} seconds")
-        self.logger.info(f"Total records inserted: {overall_stats['total_records']}")
+        self.logger.info("Duration: %.2f seconds", duration)
+        self.logger.info("Total records inserted: %d", overall_stats['total_records'])
         self.logger.info("=" * 60)
 
+        # Only a complete run may short-circuit the next ones
+        if overall_stats['total_failed'] == 0:
+            self._save_last_run(overall_stats)
+
         return overall_stats
 
     def get_related_queries(self, keyword: str) -> Dict:
@@ -222,12 +580,14 @@ class QuebecTrendsCollector:
             Dictionary with top and rising related queries
         """
         try:
+            self.bucket.acquire()
             self.pytrends.build_payload(
                 kw_list=[keyword],
-                geo=self.config['google_trends']['geo']
+                geo=self._geo
             )
 
             related = self.pytrends.related_queries()
+            self.bucket.record_success()
 
             if keyword in related:
                 return {
@@ -236,8 +596,12 @@ class QuebecTrendsCollector:
                     'rising': related[keyword]['rising']
                 }
 
+        except TooManyRequestsError as e:
+            self.logger.warning("Rate limited while getting related queries for '%s': %s", keyword, e)
+            self.bucket.penalize()
+
         except Exception as e:
-            self.logger.error(f"Error getting related queries for '{keyword}': {e}")
+            self.logger.error("Error getting related queries for '%s': %s", keyword, e)
 
         return {'keyword': keyword, 'top': None, 'rising': None}
 
@@ -245,48 +609,70 @@ class QuebecTrendsCollector:
         """
         Update keywords that haven't been collected recently.
 
+        Stale keywords are requested with their whole fixed batch (see
+        collect_category), and every keyword of the batch is stored, so a
+        keyword's values never end up on a different scale than its
+        batch-mates'.
+
         Args:
             days_threshold: Update if last collection is older than this many days
 
         Returns:
             Collection statistics
         """
-        from datetime import timedelta
-
-        self.logger.info(f"Checking for stale data (>{days_threshold} days old)")
+        self.logger.info("Checking for stale data (>%s days old)", days_threshold)
 
         keywords_to_update = []
         cutoff_date = datetime.now() - timedelta(days=days_threshold)
 
-        # Check each category
-        for category, keywords in self.config['keywords'].items():
-            for keyword in keywords:
-                last_collection = self.db.get_latest_collection_date(keyword)
+        # One aggregate query instead of one lookup per keyword
+        latest_collections = self.db.get_latest_collection_dates()
+
+        # Check each configured keyword
+        for keyword, category in self._flat_keywords:
+            last_collection = latest_collections.get(keyword)
 
-                if last_collection is None or last_collection < cutoff_date:
-                    keywords_to_update.append((keyword, category))
-                    self.logger.info(f"Keyword '{keyword}' needs update (last: {last_collection})")
+            if last_collection is None or last_collection < cutoff_date:
+                keywords_to_update.append((keyword, category))
+                self.logger.info("Keyword '%s' needs update (last: %s)", keyword, last_collection)
 
         if not keywords_to_update:
             self.logger.info("All data is up to date!")
             return {'keywords_updated': 0, 'message': 'No updates needed'}
 
-        # Update stale keywords
-        self.logger.info(f"Updating {len(keywords_to_update)} keywords")
+        # Update stale keywords, one request per batch containing any
+        self.logger.info("Updating %d keywords", len(keywords_to_update))
+        stale = {keyword for keyword, _ in keywords_to_update}
 
         total_records = 0
-        for keyword, category in keywords_to_update:
-            data = self.collect_keyword_data(keyword, category)
-            if data is not None:
-                records = self.db.insert_trends_data(keyword, category, data)
-                total_records += records
-            time.sleep(self.config['collection']['delay_between_requests'])
+        keywords_requested = 0
+        for category, batches in self._category_batches.items():
+            for batch in batches:
+                if stale.isdisjoint(batch):
+                    continue
+
+                keywords_requested += len(batch)
+                results = self.collect_keyword_batch(list(batch), category)
+                for keyword, data in results.items():
+                    total_records += self._store_keyword_data(keyword, category, data)
 
         return {
             'keywords_updated': len(keywords_to_update),
+            'keywords_requested': keywords_requested,
             'records_inserted': total_records
         }
 
+    def close(self):
+        """Close the database connection and the shared HTTP session."""
+        self.db.close()
+        self.session.close()
+
+    def __enter__(self) -> 'QuebecTrendsCollector':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 
 if __name__ == "__main__":
     # Example usage
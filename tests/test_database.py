@@ -3,6 +3,7 @@ Basic tests for database functionality.
 """
 
 import pytest
+import sqlite3
 import sys
 from pathlib import Path
 import tempfile
@@ -19,57 +20,355 @@ def test_database_creation():
     """Test database initialization."""
     with tempfile.TemporaryDirectory() as tmpdir:
         db_path = Path(tmpdir) / "test.db"
-        db = TrendsDatabase(str(db_path))
-
-        assert db_path.exists()
-        print("✓ Database created successfully")
+        with TrendsDatabase(str(db_path)) as db:
+            assert db_path.exists()
+            print("✓ Database created successfully")
 
 
 def test_insert_and_retrieve_data():
     """Test inserting and retrieving trends data."""
     with tempfile.TemporaryDirectory() as tmpdir:
         db_path = Path(tmpdir) / "test.db"
-        db = TrendsDatabase(str(db_path))
+        with TrendsDatabase(str(db_path)) as db:
+            # Create sample data
+            dates = pd.date_range(start='2024-01-01', periods=10, freq='D')
+            data = pd.DataFrame({
+                'test_keyword': range(10, 20)
+            }, index=dates)
+
+            # Insert data
+            records = db.insert_trends_data('test_keyword', 'test_category', data)
+            assert records == 10
+            print(f"✓ Inserted {records} records")
+
+            # Retrieve data
+            retrieved = db.get_trends_data(keywords=['test_keyword'])
+            assert len(retrieved) == 10
+            assert 'test_keyword' in retrieved['keyword'].values
+            print(f"✓ Retrieved {len(retrieved)} records")
+
+
+def test_insert_trends_rows():
+    """Test the bulk insert path taking epoch seconds and int16 values."""
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            timestamps = np.array(['2024-01-07', '2024-01-14'], dtype='datetime64[s]').astype(np.int64)
+            interest = np.array([42, 100], dtype=np.int16)
+
+            records = db.insert_trends_rows('test_keyword', 'test_category', timestamps, interest)
+            assert records == 2
+
+            retrieved = db.get_trends_data(keywords=['test_keyword'])
+            assert list(retrieved['date'].dt.strftime('%Y-%m-%d')) == ['2024-01-07', '2024-01-14']
+            assert list(retrieved['interest']) == [42, 100]
+            print(f"✓ Bulk inserted {records} records")
+
+
+def test_insert_trends_rows_rejects_out_of_range():
+    """Test that values the packed uint8 series can't hold are rejected."""
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            timestamps = np.array(['2024-01-07', '2024-01-14', '2024-01-21'], dtype='datetime64[s]').astype(np.int64)
+
+            for interest in ([300, 255, 100], [-1, 50, 100]):
+                with pytest.raises(ValueError):
+                    db.insert_trends_rows('test_keyword', 'test_category', timestamps, np.array(interest))
+
+            assert db.get_trends_data(keywords=['test_keyword']).empty
+            assert db.get_trends_series(keywords=['test_keyword']).empty
+            print("✓ Out-of-range interest rejected")
+
+
+def test_retrieve_multiple_categories():
+    """Test filtering on several categories in a single query."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            dates = pd.date_range(start='2024-01-01', periods=5, freq='D')
+            for keyword, category in [('a', 'cat1'), ('b', 'cat2'), ('c', 'cat3')]:
+                data = pd.DataFrame({keyword: range(5)}, index=dates)
+                db.insert_trends_data(keyword, category, data)
+
+            retrieved = db.get_trends_data(categories=['cat1', 'cat3'])
+            assert len(retrieved) == 10
+            assert set(retrieved['category']) == {'cat1', 'cat3'}
+            print(f"✓ Retrieved {len(retrieved)} records for 2 categories")
+
+
+def test_category_aggregations():
+    """Test per-keyword stats and per-date category means computed in SQL."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            dates = pd.date_range(start='2024-01-01', periods=4, freq='D')
+            db.insert_trends_data('a', 'cat1', pd.DataFrame({'a': [10, 20, 30, 40]}, index=dates))
+            db.insert_trends_data('b', 'cat1', pd.DataFrame({'b': [30, 40, 50, 60]}, index=dates))
+
+            stats = db.get_category_keyword_stats(['cat1'], '2024-01-01', '2024-01-04')
+            assert list(stats['category']) == ['cat1', 'cat1']
+            assert list(stats['keyword']) == ['b', 'a']
+            assert list(stats['avg_interest']) == [45.0, 25.0]
+            assert list(stats['max_interest']) == [60, 40]
+
+            means = db.get_daily_category_means(['cat1'], '2024-01-02', '2024-01-04')
+            assert len(means) == 3
+            assert list(means['interest']) == [30.0, 40.0, 50.0]
+
+            # Re-inserting a keyword refreshes the materialized means
+            db.insert_trends_data('a', 'cat1', pd.DataFrame({'a': [0, 0, 0, 0]}, index=dates))
+            means = db.get_daily_category_means(['cat1'], '2024-01-02', '2024-01-04')
+            assert list(means['interest']) == [20.0, 25.0, 30.0]
+            print("✓ Category aggregations working")
+
+
+def test_trend_windows_with_weekly_data():
+    """Test the 30-day trend windows anchored on each category's last date."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            # 12 Sundays ending 2024-10-20: 5 fall in (Sep 20, Oct 20], the
+            # 4 before them in (Aug 21, Sep 20], the first 3 in neither window
+            dates = pd.date_range(end='2024-10-20', periods=12, freq='W')
+            interest = [50] * 3 + [60] * 4 + [80] * 5
+            db.insert_trends_data('a', 'cat1', pd.DataFrame({'a': interest}, index=dates))
+
+            windows = db.get_trend_windows(['cat1', 'empty']).set_index('category')
+            assert list(windows.index) == ['cat1']
+            assert windows.loc['cat1', 'recent_avg'] == 80
+            assert windows.loc['cat1', 'older_avg'] == 60
+            assert windows.loc['cat1', 'avg_interest'] == sum(interest) / len(interest)
+            print("✓ Trend windows working")
+
+
+def test_packed_series_match_trends_data():
+    """Test that packed series return the same rows as trends_data."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            weekly = pd.date_range(start='2024-01-07', periods=10, freq='W')
+            db.insert_trends_data('weekly', 'cat1', pd.DataFrame({'weekly': range(10)}, index=weekly))
+
+            # Irregular dates leave gaps that must not come back as values
+            irregular = pd.to_datetime(['2024-01-01', '2024-01-04', '2024-01-10'])
+            db.insert_trends_data('irregular', 'cat2', pd.DataFrame({'irregular': [100, 0, 42]}, index=irregular))
+
+            columns = ['keyword', 'category', 'date', 'interest']
+            expected = db.get_trends_data(start_date='2024-01-04', end_date='2024-02-20')[columns]
+            series = db.get_trends_series(start_date='2024-01-04', end_date='2024-02-20')
+
+            sort_keys = ['keyword', 'date']
+            pd.testing.assert_frame_equal(
+                series.sort_values(sort_keys, ignore_index=True),
+                expected.sort_values(sort_keys, ignore_index=True)
+            )
+
+            assert len(db.get_trends_series(categories=['cat2'])) == 3
+            print("✓ Packed series working")
+
+
+def test_derived_tables_backfill():
+    """Test that packed series and category means are rebuilt for existing databases."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            dates = pd.date_range(start='2024-01-01', periods=10, freq='D')
+            db.insert_trends_data('test_keyword', 'test_category', pd.DataFrame({'test_keyword': range(10)}, index=dates))
+            db._conn.execute("DELETE FROM trends_series")
+            db._conn.execute("DELETE FROM trends_daily_category_mean")
+
+        with TrendsDatabase(str(db_path)) as db:
+            assert len(db.get_trends_series()) == 10
+            assert len(db.get_daily_category_means(['test_category'])) == 10
+        print("✓ Derived tables backfill working")
+
+
+def test_category_means_follow_moved_keyword():
+    """Test that moving a keyword to another category updates both categories' means."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            dates = pd.date_range(start='2024-01-01', periods=3, freq='D')
+            db.insert_trends_data('x', 'c1', pd.DataFrame({'x': [10, 20, 30]}, index=dates))
+            db.insert_trends_data('y', 'c1', pd.DataFrame({'y': [50]}, index=dates[:1]))
+
+            db.insert_trends_data('x', 'c2', pd.DataFrame({'x': [10, 20, 30]}, index=dates))
+
+            c1 = db.get_daily_category_means(['c1'])
+            c2 = db.get_daily_category_means(['c2'])
+            assert c1['interest'].tolist() == [50]
+            assert sorted(c2['interest'].tolist()) == [10, 20, 30]
+            print("✓ Category means follow moved keywords")
+
+
+def test_insert_from_multiple_threads():
+    """Test that the shared connection can be used from worker threads."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            dates = pd.date_range(start='2024-01-01', periods=10, freq='D')
+            keywords = [f'keyword_{i}' for i in range(4)]
+
+            def insert(keyword):
+                data = pd.DataFrame({keyword: range(10)}, index=dates)
+                return db.insert_trends_data(keyword, 'test_category', data)
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(insert, keywords))
+
+            assert results == [10] * 4
+            assert db.get_summary_stats()['total_records'] == 40
+        print("✓ Concurrent inserts working")
+
+
+def test_cached_lookups_invalidated_on_insert():
+    """Test that memoized keyword lookups see newly inserted data."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            assert db.get_all_keywords() == []
+            assert db.get_latest_collection_date('test_keyword') is None
 
-        # Create sample data
-        dates = pd.date_range(start='2024-01-01', periods=10, freq='D')
-        data = pd.DataFrame({
-            'test_keyword': range(10, 20)
-        }, index=dates)
+            dates = pd.date_range(start='2024-01-01', periods=3, freq='D')
+            db.insert_trends_data('test_keyword', 'test_category', pd.DataFrame({'test_keyword': [1, 2, 3]}, index=dates))
 
-        # Insert data
-        records = db.insert_trends_data('test_keyword', 'test_category', data)
-        assert records == 10
-        print(f"✓ Inserted {records} records")
+            assert db.get_all_keywords() == ['test_keyword']
+            assert isinstance(db.get_latest_collection_date('test_keyword'), datetime)
+            print("✓ Cached lookups invalidated on insert")
 
-        # Retrieve data
-        retrieved = db.get_trends_data(keywords=['test_keyword'])
-        assert len(retrieved) == 10
-        assert 'test_keyword' in retrieved['keyword'].values
-        print(f"✓ Retrieved {len(retrieved)} records")
+
+def test_cached_lookups_see_other_instances_writes():
+    """Test that memoized lookups are invalidated by another connection's insert."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as reader, TrendsDatabase(str(db_path)) as writer:
+            assert reader.get_all_keywords() == []
+            assert reader.get_latest_collection_date('test_keyword') is None
+
+            dates = pd.date_range(start='2024-01-01', periods=3, freq='D')
+            writer.insert_trends_data('test_keyword', 'test_category', pd.DataFrame({'test_keyword': [1, 2, 3]}, index=dates))
+
+            assert reader.get_all_keywords() == ['test_keyword']
+            assert isinstance(reader.get_latest_collection_date('test_keyword'), datetime)
+            print("✓ Cached lookups invalidated by other connections")
+
+
+def test_get_latest_dates_bulk():
+    """Test fetching the latest data date of every keyword at once."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            db.insert_trends_data('a', 'cat1', pd.DataFrame({'a': [1, 2]}, index=pd.date_range('2024-01-01', periods=2)))
+            db.insert_trends_data('b', 'cat1', pd.DataFrame({'b': [1]}, index=pd.date_range('2024-03-01', periods=1)))
+
+            assert db.get_latest_dates_bulk() == {'a': '2024-01-02', 'b': '2024-03-01'}
+            print("✓ Bulk latest dates working")
+
+
+def test_get_latest_collection_dates():
+    """Test fetching the latest collection date of every keyword at once."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            db.insert_trends_data('a', 'cat1', pd.DataFrame({'a': [1, 2]}, index=pd.date_range('2024-01-01', periods=2)))
+            db.insert_trends_data('b', 'cat1', pd.DataFrame({'b': [1]}, index=pd.date_range('2024-03-01', periods=1)))
+
+            latest = db.get_latest_collection_dates()
+            assert sorted(latest) == ['a', 'b']
+            assert latest['a'] == db.get_latest_collection_date('a')
+            assert isinstance(latest['b'], datetime)
+            print("✓ Bulk latest collection dates working")
+
+
+def test_log_collection_failed_keywords():
+    """Test that failed keywords are stored as a queryable JSON array."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            db.log_collection(['a', 'b', 'c'], success=False, records_inserted=10, failed_keywords=['b', 'c'])
+            db.log_collection(['d'], success=True, records_inserted=5)
+
+            rows = db._conn.execute("""
+                SELECT failed.value
+                FROM collection_metadata, json_each(collection_metadata.failed_keywords) AS failed
+                ORDER BY failed.value
+            """).fetchall()
+            assert [row[0] for row in rows] == ['b', 'c']
+
+        # Databases created before the column existed are migrated on open
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            DROP TABLE collection_metadata;
+            CREATE TABLE collection_metadata (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                keywords_collected TEXT,
+                success BOOLEAN,
+                error_message TEXT,
+                records_inserted INTEGER DEFAULT 0
+            );
+        """)
+        conn.close()
+
+        with TrendsDatabase(str(db_path)) as db:
+            db.log_collection(['e'], success=False, failed_keywords=['e'])
+            assert db._conn.execute("SELECT failed_keywords FROM collection_metadata").fetchone()[0] == '["e"]'
+            print("✓ Failed keywords logging working")
+
+
+def test_failed_commit_rolls_back():
+    """Test that a failed COMMIT doesn't leave the shared connection in a transaction."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        with TrendsDatabase(str(db_path)) as db:
+            # Deferred foreign keys are only checked, and fail, at COMMIT
+            db._conn.executescript("""
+                CREATE TABLE parent (id INTEGER PRIMARY KEY);
+                CREATE TABLE child (
+                    parent_id INTEGER REFERENCES parent(id) DEFERRABLE INITIALLY DEFERRED
+                );
+            """)
+
+            with pytest.raises(sqlite3.IntegrityError):
+                with db._transaction() as cursor:
+                    cursor.execute("INSERT INTO child VALUES (1)")
+
+            assert not db._conn.in_transaction
+            db.log_collection(['test_keyword'], success=True)
+            print("✓ Failed commit rolled back")
 
 
 def test_get_summary_stats():
     """Test summary statistics."""
     with tempfile.TemporaryDirectory() as tmpdir:
         db_path = Path(tmpdir) / "test.db"
-        db = TrendsDatabase(str(db_path))
+        with TrendsDatabase(str(db_path)) as db:
+            stats = db.get_summary_stats()
+            assert 'total_records' in stats
+            assert stats['total_records'] == 0
+            assert stats['last_successful_collection'] is None
 
-        stats = db.get_summary_stats()
-        assert 'total_records' in stats
-        assert stats['total_records'] == 0
-        print("✓ Summary stats working")
+            db.log_collection(['test_keyword'], success=True, records_inserted=1)
+            stats = db.get_summary_stats()
+            assert isinstance(stats['last_successful_collection'], datetime)
+            print("✓ Summary stats working")
 
 
 def test_backup_database():
     """Test database backup."""
     with tempfile.TemporaryDirectory() as tmpdir:
         db_path = Path(tmpdir) / "test.db"
-        db = TrendsDatabase(str(db_path))
-
-        backup_path = db.backup_database(str(Path(tmpdir) / "backup.db"))
-        assert Path(backup_path).exists()
-        print(f"✓ Backup created at {backup_path}")
+        with TrendsDatabase(str(db_path)) as db:
+            backup_path = db.backup_database(str(Path(tmpdir) / "backup.db"))
+            assert Path(backup_path).exists()
+            print(f"✓ Backup created at {backup_path}")
 
 
 if __name__ == "__main__":
@@ -81,6 +380,21 @@ if __name__ == "__main__":
     try:
         test_database_creation()
         test_insert_and_retrieve_data()
+        test_insert_trends_rows()
+        test_insert_trends_rows_rejects_out_of_range()
+        test_retrieve_multiple_categories()
+        test_category_aggregations()
+        test_trend_windows_with_weekly_data()
+        test_packed_series_match_trends_data()
+        test_derived_tables_backfill()
+        test_category_means_follow_moved_keyword()
+        test_insert_from_multiple_threads()
+        test_cached_lookups_invalidated_on_insert()
+        test_cached_lookups_see_other_instances_writes()
+        test_get_latest_dates_bulk()
+        test_get_latest_collection_dates()
+        test_log_collection_failed_keywords()
+        test_failed_commit_rolls_back()
         test_get_summary_stats()
         test_backup_database()
 
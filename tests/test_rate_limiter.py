@@ -0,0 +1,70 @@
+"""
+Tests for the adaptive token-bucket rate limiter.
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data_collection.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    """Deterministic stand-in for time.monotonic/time.sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch('src.data_collection.rate_limiter.time', fake):
+        yield fake
+
+
+def test_acquire_sleeps_only_the_deficit(clock):
+    """Test that the burst is free and later requests wait 1/rate."""
+    bucket = TokenBucket(rate=2.0, burst=2)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+
+    # Idle time refills the bucket (up to burst)
+    clock.now += 10
+    assert bucket.acquire() == 0
+
+
+def test_penalize_halves_rate_and_recovers(clock):
+    """Test AIMD: halve on 429, back off, then recover additively up to the cap."""
+    bucket = TokenBucket(rate=1.0, burst=3, recovery=0.25)
+
+    backoff = bucket.penalize()
+    assert bucket.rate == 0.5
+    assert backoff == pytest.approx(2.0)
+
+    # Saved-up burst is dropped: only the token earned during the backoff is left
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(2.0)
+
+    # Consecutive penalties back off exponentially
+    assert bucket.penalize() == pytest.approx(8.0)
+    assert bucket.rate == 0.25
+
+    for _ in range(10):
+        bucket.record_success()
+    assert bucket.rate == 1.0
@@ -4,10 +4,11 @@ Unit tests for the 30-day trend calculation in the dashboard.
 Tests the date-based filtering approach vs the old data-point-based approach.
 """
 import unittest
-from datetime import datetime, timedelta
 import sys
 from pathlib import Path
 
+import numpy as np
+
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -15,54 +16,46 @@ sys.path.append(str(Path(__file__).parent.parent))
 class TestTrendCalculation(unittest.TestCase):
     """Test cases for the 30-day trend calculation logic."""
 
-    def setUp(self):
-        """Set up test data."""
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data (once for the class; tests must not modify it)."""
         # Create mock weekly data for 12 months (52 weeks)
         # Simulating Google Trends weekly data
-        self.end_date = datetime(2024, 10, 22)
-        self.mock_weekly_data = []
-        
-        # Generate 52 weeks of data (12 months)
-        for week_offset in range(52):
-            date = self.end_date - timedelta(weeks=week_offset)
-            # Simulate increasing trend in recent 30 days
-            if week_offset < 4:  # Last ~4 weeks (28 days)
-                interest = 70 + week_offset * 5
-            elif week_offset < 8:  # Previous 30 days period
-                interest = 50 + week_offset * 2
-            else:
-                interest = 50
-            
-            self.mock_weekly_data.append({
-                'date': date,
-                'interest': interest,
-                'category': 'test'
-            })
-        
-        # Reverse to chronological order
-        self.mock_weekly_data.reverse()
+        cls.end_date = np.datetime64('2024-10-22', 'D')
+
+        # Stored as parallel arrays (one per column) rather than a list of
+        # dicts, the same layout the dashboard gets from the database, so
+        # windows are boolean masks instead of per-row Python filters
+        week_offsets = np.arange(52)[::-1]  # Chronological order
+        cls.dates = cls.end_date - week_offsets * np.timedelta64(7, 'D')
+
+        # Simulate increasing trend in recent 30 days
+        cls.interest = np.select(
+            [week_offsets < 4, week_offsets < 8],  # Last ~4 weeks, previous 30 days
+            [70 + week_offsets * 5, 50 + week_offsets * 2],
+            default=50
+        ).astype(np.int16)
+
+        # Windows anchored on the most recent date (as in the fixed implementation)
+        cls.max_date = cls.dates.max()
+        cls.recent_start = cls.max_date - np.timedelta64(30, 'D')
+        cls.older_start = cls.max_date - np.timedelta64(60, 'D')
+        cls.mask_recent = cls.dates > cls.recent_start
+        cls.mask_older = (cls.dates > cls.older_start) & (cls.dates <= cls.recent_start)
+
+        # Shared between tests: make accidental writes fail loudly
+        for array in (cls.dates, cls.interest, cls.mask_recent, cls.mask_older):
+            array.flags.writeable = False
 
     def test_date_based_filtering_with_weekly_data(self):
         """Test that date-based filtering works correctly with weekly data."""
-        # Get the most recent date
-        max_date = max(d['date'] for d in self.mock_weekly_data)
-        
-        # Define date ranges (as in the fixed implementation)
-        recent_start = max_date - timedelta(days=30)
-        older_start = max_date - timedelta(days=60)
-        older_end = recent_start
-        
-        # Filter data by date ranges
-        recent_data = [d for d in self.mock_weekly_data if d['date'] > recent_start]
-        older_data = [d for d in self.mock_weekly_data if older_start < d['date'] <= older_end]
-        
         # Assert we have data in both periods
-        self.assertGreater(len(recent_data), 0, "Should have data in recent period")
-        self.assertGreater(len(older_data), 0, "Should have data in older period")
+        self.assertGreater(self.mask_recent.sum(), 0, "Should have data in recent period")
+        self.assertGreater(self.mask_older.sum(), 0, "Should have data in older period")
         
         # Calculate averages
-        recent_avg = sum(d['interest'] for d in recent_data) / len(recent_data)
-        older_avg = sum(d['interest'] for d in older_data) / len(older_data)
+        recent_avg = self.interest[self.mask_recent].mean()
+        older_avg = self.interest[self.mask_older].mean()
         
         # Assert averages are calculated correctly
         self.assertGreater(recent_avg, 0, "Recent average should be positive")
@@ -75,7 +68,7 @@ class TestTrendCalculation(unittest.TestCase):
         """Test that the old implementation would fail with 52 weeks of data."""
         # The old condition: if len(cat_data) > 60
         # With 52 weeks of data, this would NOT be met
-        self.assertLessEqual(len(self.mock_weekly_data), 60, 
+        self.assertLessEqual(len(self.dates), 60, 
                             "52 weeks of data should be <= 60 data points")
         
         # This means the old implementation would NOT show a trend
@@ -83,24 +76,17 @@ class TestTrendCalculation(unittest.TestCase):
 
     def test_date_ranges_are_correct(self):
         """Test that date ranges span exactly 30 days."""
-        max_date = max(d['date'] for d in self.mock_weekly_data)
-        
-        recent_start = max_date - timedelta(days=30)
-        older_start = max_date - timedelta(days=60)
-        older_end = recent_start
+        recent_dates = self.dates[self.mask_recent]
+        older_dates = self.dates[self.mask_older]
         
-        # Filter data
-        recent_data = [d for d in self.mock_weekly_data if d['date'] > recent_start]
-        older_data = [d for d in self.mock_weekly_data if older_start < d['date'] <= older_end]
-        
-        if recent_data:
+        if recent_dates.size:
             # Recent period should span ~30 days (might be slightly less due to weekly data)
-            recent_span = (max(d['date'] for d in recent_data) - min(d['date'] for d in recent_data)).days
+            recent_span = (recent_dates.max() - recent_dates.min()).astype(int)
             self.assertLessEqual(recent_span, 30, "Recent period should span at most 30 days")
         
-        if older_data:
+        if older_dates.size:
             # Older period should span ~30 days
-            older_span = (max(d['date'] for d in older_data) - min(d['date'] for d in older_data)).days
+            older_span = (older_dates.max() - older_dates.min()).astype(int)
             self.assertLessEqual(older_span, 30, "Older period should span at most 30 days")
 
     def test_handles_empty_data(self):
@@ -117,77 +103,60 @@ class TestTrendCalculation(unittest.TestCase):
     def test_handles_insufficient_data(self):
         """Test handling of insufficient data for both periods."""
         # Create data for only 20 days (insufficient for 60-day comparison)
-        short_data = []
-        end_date = datetime(2024, 10, 22)
-        
-        for day_offset in range(20):
-            date = end_date - timedelta(days=day_offset)
-            short_data.append({
-                'date': date,
-                'interest': 50,
-                'category': 'test'
-            })
+        short_dates = self.end_date - np.arange(20)[::-1]
         
-        max_date = max(d['date'] for d in short_data)
-        recent_start = max_date - timedelta(days=30)
-        older_start = max_date - timedelta(days=60)
-        older_end = recent_start
+        max_date = short_dates.max()
+        recent_start = max_date - np.timedelta64(30, 'D')
+        older_start = max_date - np.timedelta64(60, 'D')
         
-        recent_data = [d for d in short_data if d['date'] > recent_start]
-        older_data = [d for d in short_data if older_start < d['date'] <= older_end]
+        older_mask = (short_dates > older_start) & (short_dates <= recent_start)
         
         # With only 20 days of data, we might not have data in the older period
         # The implementation should handle this with the check:
         # if len(recent_data) > 0 and len(older_data) > 0
-        if len(older_data) == 0:
+        if not older_mask.any():
             self.assertTrue(True, "Correctly identifies insufficient data in older period")
 
 
 class TestTrendCalculationWithDailyData(unittest.TestCase):
     """Test cases with daily data (different frequency)."""
 
-    def setUp(self):
-        """Set up daily data for testing."""
-        self.end_date = datetime(2024, 10, 22)
-        self.mock_daily_data = []
-        
-        # Generate 90 days of data
-        for day_offset in range(90):
-            date = self.end_date - timedelta(days=day_offset)
-            # Simulate increasing trend in recent 30 days
-            if day_offset < 30:
-                interest = 70 + day_offset * 0.5
-            elif day_offset < 60:
-                interest = 50 + day_offset * 0.2
-            else:
-                interest = 50
-            
-            self.mock_daily_data.append({
-                'date': date,
-                'interest': interest,
-                'category': 'test'
-            })
-        
-        self.mock_daily_data.reverse()
+    @classmethod
+    def setUpClass(cls):
+        """Set up daily data for testing (once for the class, read-only)."""
+        cls.end_date = np.datetime64('2024-10-22', 'D')
+
+        # Generate 90 days of data (chronological order)
+        day_offsets = np.arange(90)[::-1]
+        cls.dates = cls.end_date - day_offsets.astype('timedelta64[D]')
+
+        # Simulate increasing trend in recent 30 days
+        cls.interest = np.where(
+            day_offsets < 30, 70 + day_offsets * 0.5,
+            np.where(day_offsets < 60, 50 + day_offsets * 0.2, 50.0)
+        )
+
+        for array in (cls.dates, cls.interest):
+            array.flags.writeable = False
 
     def test_date_based_filtering_with_daily_data(self):
         """Test that date-based filtering works correctly with daily data."""
-        max_date = max(d['date'] for d in self.mock_daily_data)
+        max_date = self.dates.max()
         
-        recent_start = max_date - timedelta(days=30)
-        older_start = max_date - timedelta(days=60)
+        recent_start = max_date - np.timedelta64(30, 'D')
+        older_start = max_date - np.timedelta64(60, 'D')
         older_end = recent_start
         
-        recent_data = [d for d in self.mock_daily_data if d['date'] > recent_start]
-        older_data = [d for d in self.mock_daily_data if older_start < d['date'] <= older_end]
+        mask_recent = self.dates > recent_start
+        mask_older = (self.dates > older_start) & (self.dates <= older_end)
         
         # With daily data, we should have ~30 data points in each period
-        self.assertGreater(len(recent_data), 20, "Should have at least 20 recent data points")
-        self.assertGreater(len(older_data), 20, "Should have at least 20 older data points")
+        self.assertGreater(mask_recent.sum(), 20, "Should have at least 20 recent data points")
+        self.assertGreater(mask_older.sum(), 20, "Should have at least 20 older data points")
         
         # Calculate trend
-        recent_avg = sum(d['interest'] for d in recent_data) / len(recent_data)
-        older_avg = sum(d['interest'] for d in older_data) / len(older_data)
+        recent_avg = self.interest[mask_recent].mean()
+        older_avg = self.interest[mask_older].mean()
         
         self.assertGreater(recent_avg, older_avg, "Recent trend should be higher with daily data")
 
@@ -0,0 +1,298 @@
+"""
+Tests for the Google Trends collector, using a fake pytrends client.
+"""
+
+import atexit
+import io
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+import requests
+import yaml
+from pytrends import exceptions
+from urllib3 import HTTPConnectionPool, HTTPResponse
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.data_collection.rate_limiter import TokenBucket
+from src.data_collection.trends_client import SessionTrendReq, create_session
+from src.data_collection import trends_collector
+from src.data_collection.trends_collector import QuebecTrendsCollector
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.yaml"
+
+
+class FakeTrendReq:
+    """Stand-in for pytrends' TrendReq that records the payloads it receives."""
+
+    def __init__(self, payloads, missing=()):
+        self.payloads = payloads
+        self.missing = set(missing)
+        self.kw_list = []
+
+    def build_payload(self, kw_list, geo='', timeframe=''):
+        self.kw_list = list(kw_list)
+        self.payloads.append(self.kw_list)
+
+    def interest_over_time(self):
+        dates = pd.date_range(end='2024-10-20', periods=3, freq='W')
+        columns = {kw: [10, 20, 30] for kw in self.kw_list if kw not in self.missing}
+        columns['isPartial'] = [False, False, True]
+        return pd.DataFrame(columns, index=dates)
+
+
+@pytest.fixture
+def extra_keywords():
+    """Categories added to the test config (override with parametrize)."""
+    return {}
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch, extra_keywords):
+    """Collector writing its database, logs and run cache under tmp_path."""
+    config = yaml.safe_load(CONFIG_PATH.read_text(encoding='utf-8'))
+    config['keywords'].update(extra_keywords)
+    config['database']['path'] = str(tmp_path / "trends.db")
+    config['collection']['last_run_cache'] = str(tmp_path / "cache" / "last_run.json")
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config, allow_unicode=True), encoding='utf-8')
+
+    monkeypatch.setattr(trends_collector, 'LOG_FILE', tmp_path / "logs" / "trends_collector.log")
+
+    with patch('src.data_collection.trends_collector.SessionTrendReq'):
+        with QuebecTrendsCollector(str(config_path)) as collector:
+            yield collector
+
+
+def test_collect_keyword_batch_splits_columns(collector):
+    """Test that one request returns a frame per keyword with data."""
+    payloads = []
+    client = FakeTrendReq(payloads, missing={'b'})
+
+    results = collector.collect_keyword_batch(['a', 'b', 'c'], 'test', pytrends=client)
+
+    assert payloads == [['a', 'b', 'c']]
+    assert sorted(results) == ['a', 'c']
+    assert results['a'].name == 'a'
+    assert results['a'].tolist() == [10, 20, 30]
+    assert results['a'].index.name == 'date'
+
+
+def test_collect_category_batches_requests(collector):
+    """Test that a category is collected with one request per batch of 5."""
+    payloads = []
+    collector.pytrends = FakeTrendReq(payloads, missing={'canapé'})
+    collector._create_client = lambda: FakeTrendReq(payloads, missing={'canapé'})
+    collector.bucket = TokenBucket(rate=1000, burst=10)
+
+    stats = collector.collect_category_sync('meubles')
+
+    keywords = collector.config['keywords']['meubles']
+    assert sorted(len(p) for p in payloads) == [2, 5]
+    assert sorted(kw for p in payloads for kw in p) == sorted(keywords)
+    assert stats['successful'] == len(keywords) - 1
+    assert stats['failed_keywords'] == ['canapé']
+    assert stats['records_inserted'] == 3 * (len(keywords) - 1)
+
+
+def test_collect_category_keeps_batches_stable(collector):
+    """Test that fresh keywords don't regroup the remaining ones into new batches."""
+    payloads = []
+    collector._create_client = lambda: FakeTrendReq(payloads)
+    collector.bucket = TokenBucket(rate=1000, burst=10)
+
+    keywords = collector.config['keywords']['meubles']
+    # First batch entirely fresh, second batch partly fresh
+    latest_dates = {kw: '2999-01-01' for kw in keywords[:6]}
+
+    stats = collector.collect_category_sync('meubles', latest_dates=latest_dates)
+
+    assert payloads == [keywords[5:7]]
+    assert stats['skipped'] == 5
+    assert stats['successful'] == 2
+
+
+def test_update_stale_data_requests_whole_batch(collector, monkeypatch):
+    """Test that a stale keyword is requested and stored with its batch-mates."""
+    payloads = []
+    collector.pytrends = FakeTrendReq(payloads)
+    collector.bucket = TokenBucket(rate=1000, burst=10)
+
+    keywords = collector.config['keywords']['meubles']
+    # Only the last meubles keyword is stale
+    fresh = {kw: datetime.now() for kw, _ in collector._flat_keywords if kw != keywords[6]}
+    monkeypatch.setattr(collector.db, 'get_latest_collection_dates', lambda: fresh)
+
+    stats = collector.update_stale_data()
+
+    assert payloads == [keywords[5:7]]
+    assert stats['keywords_updated'] == 1
+    assert stats['keywords_requested'] == 2
+    assert stats['records_inserted'] == 3 * 2
+
+
+@pytest.mark.parametrize('extra_keywords', [{'vide': []}])
+def test_collect_category_empty_category(collector):
+    """Test that an empty category returns early without logging a run."""
+    stats = collector.collect_category_sync('vide')
+
+    assert stats['total_keywords'] == 0
+    assert stats['failed_keywords'] == []
+    assert collector.db.get_summary_stats()['last_successful_collection'] is None
+
+
+def test_collect_category_reuses_worker_clients(collector):
+    """Test that worker clients are created once and kept off self.pytrends."""
+    payloads = []
+    created = []
+    main_client = FakeTrendReq([])
+    collector.pytrends = main_client
+
+    def create_client():
+        created.append(FakeTrendReq(payloads))
+        return created[-1]
+
+    collector._create_client = create_client
+    collector.bucket = TokenBucket(rate=1000, burst=10)
+
+    collector.collect_category_sync('meubles')
+    collector.collect_category_sync('electromenagers')
+
+    assert len(created) == min(collector._max_concurrent, 2)
+    assert main_client.payloads == []
+    assert payloads
+
+
+def test_collect_all_categories_reuses_recent_run(collector):
+    """Test that a complete run short-circuits the next one until forced."""
+    payloads = []
+    collector.pytrends = FakeTrendReq(payloads)
+    collector._create_client = lambda: FakeTrendReq(payloads)
+    collector.bucket = TokenBucket(rate=1000, burst=10)
+
+    first = collector.collect_all_categories()
+    requests_sent = len(payloads)
+    assert first['total_failed'] == 0
+    assert datetime.fromisoformat(first['end_time']).tzinfo is not None
+    assert collector._last_run_path.exists()
+
+    second = collector.collect_all_categories()
+    assert second['cached'] is True
+    assert second['total_records'] == first['total_records']
+    assert len(payloads) == requests_sent
+
+    third = collector.collect_all_categories(force=True)
+    assert 'cached' not in third
+    assert len(payloads) == 2 * requests_sent
+
+
+@pytest.mark.parametrize('contents', [
+    'null',
+    '[]',
+    '{"stats": null}',
+    '{"stats": {"end_time": 0}}',
+    '{"stats": {"end_time": "not a date"}}',
+])
+def test_malformed_last_run_cache_is_ignored(collector, contents):
+    """Test that a last-run cache of the wrong shape just skips the cache."""
+    collector._last_run_path.parent.mkdir(parents=True, exist_ok=True)
+    collector._last_run_path.write_text(contents, encoding='utf-8')
+
+    assert collector._load_last_run() is None
+
+
+def test_rate_limited_batch_penalizes_bucket(collector):
+    """Test that a 429 halves the request rate and reports the batch as failed."""
+    class RateLimitedTrendReq(FakeTrendReq):
+        def interest_over_time(self):
+            raise exceptions.TooManyRequestsError('rate limited', _response(429))
+
+    collector.bucket = TokenBucket(rate=1000, burst=10)
+
+    with patch('src.data_collection.rate_limiter.time.sleep'):
+        results = collector.collect_keyword_batch(['a'], 'test', pytrends=RateLimitedTrendReq([]))
+
+    assert results == {}
+    assert collector.bucket.rate == 500
+
+
+def test_single_429_penalizes_bucket_once(collector):
+    """Test that a 429 is not retried by the transport and costs one penalty."""
+    session = create_session()
+    sent = []
+
+    def make_request(pool, conn, method, url, **kwargs):
+        sent.append(url)
+        return HTTPResponse(
+            body=io.BytesIO(b''), status=429, headers={'Retry-After': '1'},
+            preload_content=False, request_method=method, request_url=url
+        )
+
+    with patch.object(HTTPConnectionPool, '_make_request', make_request):
+        client = SessionTrendReq(session, hl='fr', tz=360)
+        # Google cookie request
+        assert len(sent) == 1
+
+        with patch.object(collector.bucket, 'penalize', return_value=0.0) as penalize:
+            results = collector.collect_keyword_batch(['a'], 'test', pytrends=client)
+
+    assert results == {}
+    assert penalize.call_count == 1
+    # Cookie request + one explore request, no transport-level retries
+    assert len(sent) == 2
+
+
+def test_log_listener_creates_directory_and_opens_file_lazily(tmp_path, monkeypatch):
+    """Test that the log directory is created first and the file on first record."""
+    root = logging.getLogger()
+    # Start from an unconfigured root logger (pytest installs its own handlers)
+    monkeypatch.setattr(root, 'handlers', [])
+    monkeypatch.setattr(root, 'level', root.level)
+    monkeypatch.setattr(trends_collector, '_log_listener', None)
+
+    log_file = tmp_path / "nested" / "logs" / "trends_collector.log"
+    trends_collector._start_log_listener(log_file)
+    listener = trends_collector._log_listener
+    try:
+        assert log_file.parent.is_dir()
+        assert not log_file.exists()
+
+        logging.getLogger('test').warning('first record')
+    finally:
+        listener.stop()
+        atexit.unregister(listener.stop)
+        for handler in listener.handlers:
+            handler.close()
+
+    assert 'first record' in log_file.read_text(encoding='utf-8')
+
+
+def _response(status_code, body='', content_type='application/json'):
+    """Build a requests.Response without touching the network."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers['Content-Type'] = content_type
+    response._content = body.encode('utf-8')
+    return response
+
+
+def test_session_client_reuses_session():
+    """Test that every request of a SessionTrendReq goes through one session."""
+    session = requests.Session()
+    responses = [_response(200), _response(200, ')]}\',{"ok": true}'), _response(429)]
+
+    with patch.object(session, 'get', side_effect=responses) as get:
+        client = SessionTrendReq(session, hl='fr', tz=360)
+        assert client._get_data('https://example.invalid', trim_chars=5) == {'ok': True}
+
+        with pytest.raises(exceptions.TooManyRequestsError):
+            client._get_data('https://example.invalid')
+
+    # Cookie request + 2 data requests, all through the shared session
+    assert get.call_count == 3